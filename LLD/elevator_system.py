@@ -11,6 +11,21 @@ The system should ensure thread safety and prevent race conditions when multiple
 """
 
 from enum import Enum
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import bisect
+import heapq
+import json
+import math
+import random
+import sys
+import time
+
+try:
+    import numpy as np  # Only needed for the array-backed FleetState.
+except ImportError:
+    np = None
 
 # Elevator state
 class Direction(Enum):
@@ -23,16 +38,76 @@ class Status(Enum):
     STOPPED = 2
     MAINTENANCE = 3
 
+class LookRequestQueue:
+    # Pending stops of one elevator served in LOOK order (SCAN that reverses at the last request, not the last floor).
+    # up holds floors at or above the car (min-heap), down holds floors at or below it (max-heap via negation).
+    # The car never passes a floor in its current heap without stopping, so the split stays valid as it moves.
+    # add / pop: O(log n), peek / membership: O(1) - versus sort() + pop(0) on a plain list.
+    def __init__(self):
+        self.up = []
+        self.down = []
+        self.floors = set()
+
+    def add(self, floor, current_floor, direction):
+        if floor in self.floors:
+            return False
+        self.floors.add(floor)
+        if floor > current_floor or (floor == current_floor and direction != Direction.DOWN):
+            heapq.heappush(self.up, floor)
+        else:
+            heapq.heappush(self.down, -floor)
+        return True
+
+    def _active_heap(self, current_floor, direction):
+        # Keep going in the current direction while it has work, otherwise reverse.
+        # An idle car simply heads for the nearest request.
+        if direction == Direction.UP:
+            return self.up if self.up else self.down
+        if direction == Direction.DOWN:
+            return self.down if self.down else self.up
+        if self.up and self.down:
+            return self.up if self.up[0] - current_floor <= current_floor + self.down[0] else self.down
+        return self.up if self.up else self.down
+
+    def peek(self, current_floor, direction):
+        heap = self._active_heap(current_floor, direction)
+        if not heap:
+            return None
+        return heap[0] if heap is self.up else -heap[0]
+
+    def pop(self, current_floor, direction):
+        heap = self._active_heap(current_floor, direction)
+        floor = heapq.heappop(heap)
+        floor = floor if heap is self.up else -floor
+        self.floors.discard(floor)
+        return floor
+
+    def __contains__(self, floor):
+        return floor in self.floors
+
+    def __len__(self):
+        return len(self.floors)
+
+    def __repr__(self):
+        return repr(sorted(self.floors))
+
 class Elevator:
-    def __init__(self, id, total_floors):
+    def __init__(self, id, total_floors, look_scheduling=False, capacity=8):
         self.id = id                    # Unique ID for the elevator
         self.current_floor = 0           # Starting floor of the elevator
         self.direction = Direction.IDLE  # Initial direction
         self.status = Status.STOPPED     # Initial status (not moving)
-        self.requests = []               # List of floors the elevator has to visit
         self.total_floors = total_floors # Total number of floors the elevator can serve
+        self.capacity = capacity         # Maximum number of passengers on board
+        self.load = 0                    # Passengers currently on board
+        # Floors the elevator has to visit: a sorted list by default, or a LookRequestQueue
+        # when the car has thousands of pending stops and re-sorting on every call gets expensive.
+        self.requests = LookRequestQueue() if look_scheduling else []
 
     def request_floor(self, floor):
+        if isinstance(self.requests, LookRequestQueue):
+            self.requests.add(floor, self.current_floor, self.direction)
+            return
         # Add a requested floor to the list if it's not already there.
         if floor not in self.requests:
             self.requests.append(floor)
@@ -42,6 +117,12 @@ class Elevator:
         elif self.direction == Direction.DOWN:
             self.requests.sort(reverse=True)  # Floors are sorted in descending order when moving down.
 
+    def next_floor(self):
+        # The floor the elevator is currently heading to, or None when there is nothing to do.
+        if isinstance(self.requests, LookRequestQueue):
+            return self.requests.peek(self.current_floor, self.direction)
+        return self.requests[0] if self.requests else None
+
     def move(self):
         # Elevator moves to the next requested floor.
         if not self.requests:
@@ -50,7 +131,7 @@ class Elevator:
             return
 
         # Get the next floor from the list of requests.
-        next_floor = self.requests[0]
+        next_floor = self.next_floor()
 
         # Moving logic: up or down
         if self.current_floor < next_floor:
@@ -61,7 +142,10 @@ class Elevator:
             self.current_floor -= 1
         else:
             # When reached the desired floor, remove it from requests.
-            self.requests.pop(0)
+            if isinstance(self.requests, LookRequestQueue):
+                self.requests.pop(self.current_floor, self.direction)
+            else:
+                self.requests.pop(0)
             self.status = Status.STOPPED
 
         # Update status to MOVING when the elevator is in transit.
@@ -72,20 +156,182 @@ class Elevator:
         # Returns the current status of the elevator.
         return f"Elevator {self.id} at floor {self.current_floor}, direction: {self.direction}, status: {self.status}, requests: {self.requests}"
 
+# Cost functions for the FloorIndexedDispatcher: lower is better, and never below the distance to the call,
+# which is what lets the dispatcher stop searching early.
+def nearest_car_cost(elevator, floor, direction):
+    return abs(elevator.current_floor - floor)
+
+def eta_cost(elevator, floor, direction):
+    # Travel ticks plus one door tick for every stop already queued on the car.
+    return abs(elevator.current_floor - floor) + len(elevator.requests)
+
+def load_aware_cost(elevator, floor, direction):
+    # Like eta_cost, but busy and crowded cars are penalised: a full car costs as much as crossing the building.
+    return (eta_cost(elevator, floor, direction) + 2 * len(elevator.requests)
+            + elevator.total_floors * elevator.load // elevator.capacity)
+
+class FloorIndexedDispatcher:
+    # Keeps elevators in one sorted list of (floor, id) per direction, so the cars that can serve a hall call
+    # are found with bisect instead of scanning the whole fleet:
+    #   UP call at floor f   -> UP cars at or below f, DOWN call -> DOWN cars at or above f, plus IDLE cars anywhere.
+    # The same cars find_closest_elevator would consider; when none of them has room the call is not assigned.
+    # Eligible cars are visited nearest first and scored by the (pluggable) cost function. As no cost is below the
+    # distance, the search stops once the distance alone exceeds the best cost so far: the answer is the same as
+    # scoring every eligible car, but usually only a few nearby ones are looked at.
+    # Update after a car moves: O(log E) search plus a shift past the cars it overtook, usually none.
+    def __init__(self, elevators, cost_function=nearest_car_cost):
+        self.elevators = {elevator.id: elevator for elevator in elevators}
+        self.cost_function = cost_function
+        self.index = {direction: [] for direction in Direction}
+        self.keys = {}  # elevator id -> (direction, floor) it is currently indexed under
+        for elevator in elevators:
+            self.update(elevator)
+
+    def update(self, elevator):
+        # Call after an elevator changes floor or direction.
+        key = (elevator.direction, elevator.current_floor)
+        old_key = self.keys.get(elevator.id)
+        if old_key == key:
+            return
+        self.keys[elevator.id] = key
+        entry = (key[1], elevator.id)
+        if not old_key or old_key[0] != key[0]:
+            if old_key:
+                bucket = self.index[old_key[0]]
+                del bucket[bisect.bisect_left(bucket, (old_key[1], elevator.id))]
+            bisect.insort(self.index[key[0]], entry)
+            return
+        # Same direction, new floor: slide the entry into place instead of deleting and re-inserting it, which
+        # would shift the rest of the list twice. A car moves one floor per tick, so it rarely passes anybody.
+        bucket = self.index[key[0]]
+        i = bisect.bisect_left(bucket, (old_key[1], elevator.id))
+        if entry > bucket[i]:
+            while i + 1 < len(bucket) and bucket[i + 1] < entry:
+                bucket[i] = bucket[i + 1]
+                i += 1
+        else:
+            while i > 0 and bucket[i - 1] > entry:
+                bucket[i] = bucket[i - 1]
+                i -= 1
+        bucket[i] = entry
+
+    @staticmethod
+    def _below(bucket, floor):
+        # (distance, id) of the cars at or below the floor, nearest first.
+        for i in range(bisect.bisect_right(bucket, (floor, float("inf"))) - 1, -1, -1):
+            car_floor, elevator_id = bucket[i]
+            yield floor - car_floor, elevator_id
+
+    @staticmethod
+    def _above(bucket, floor, inclusive=True):
+        # (distance, id) of the cars above (or at) the floor, nearest first.
+        start = bisect.bisect_left(bucket, (floor, -1) if inclusive else (floor, float("inf")))
+        for i in range(start, len(bucket)):
+            car_floor, elevator_id = bucket[i]
+            yield car_floor - floor, elevator_id
+
+    def find_elevator(self, floor, direction):
+        idle = self.index[Direction.IDLE]
+        if direction == Direction.UP:
+            moving = self._below(self.index[Direction.UP], floor)
+        else:
+            moving = self._above(self.index[Direction.DOWN], floor)
+        best = None  # (cost, id) of the cheapest car so far; ties go to the lowest id
+        for distance, elevator_id in heapq.merge(moving, self._below(idle, floor), self._above(idle, floor, False),
+                                                 key=lambda candidate: candidate[0]):
+            if best and distance > best[0]:
+                break
+            elevator = self.elevators[elevator_id]
+            if elevator.load >= elevator.capacity:
+                continue  # A full car would stop and leave everybody behind.
+            candidate = (self.cost_function(elevator, floor, direction), elevator_id)
+            if not best or candidate < best:
+                best = candidate
+        return self.elevators[best[1]] if best else None
+
+class TelemetryEvent(Enum):
+    ASSIGN = 1  # Hall call assigned to an elevator
+    STOP = 2    # Elevator cleared a requested floor
+    IDLE = 3    # Elevator has nothing to do
+
+class Telemetry:
+    # Low-overhead replacement for printing every elevator on every tick.
+    # - the last `capacity` events live in a ring buffer of parallel typed arrays (a few bytes per event, no objects)
+    # - counters for stops, travel distance (floors) and idle ticks
+    # - optionally every `sample_every`-th event is appended to a JSON-lines file
+    # Controllers hold `telemetry = None` by default, so disabled tracing costs one falsy check per car per tick.
+    def __init__(self, capacity=65536, export_path=None, sample_every=1):
+        self.capacity = capacity
+        self.ticks = array("q", [0]) * capacity
+        self.kinds = array("b", [0]) * capacity
+        self.elevator_ids = array("i", [0]) * capacity
+        self.floors = array("i", [0]) * capacity
+        self.count = 0  # Events recorded so far (the buffer keeps the last `capacity` of them)
+        self.stops = 0
+        self.travel_distance = 0
+        self.idle_ticks = 0
+        self.sample_every = sample_every
+        self.export_file = open(export_path, "a") if export_path else None
+
+    def record(self, kind, tick, elevator_id, floor):
+        i = self.count % self.capacity
+        self.ticks[i] = tick
+        self.kinds[i] = kind.value
+        self.elevator_ids[i] = elevator_id
+        self.floors[i] = floor
+        if self.export_file and self.count % self.sample_every == 0:
+            self.export_file.write(json.dumps({"tick": tick, "event": kind.name, "elevator": elevator_id, "floor": floor}) + "\n")
+        self.count += 1
+
+    def observe_move(self, tick, elevator, old_floor, old_pending, old_direction):
+        # Called after elevator.move() with the floor, pending request count and direction it had before.
+        self.travel_distance += abs(elevator.current_floor - old_floor)
+        if len(elevator.requests) < old_pending:
+            self.stops += 1
+            self.record(TelemetryEvent.STOP, tick, elevator.id, elevator.current_floor)
+        elif elevator.direction == Direction.IDLE:
+            self.idle_ticks += 1
+            if old_direction != Direction.IDLE:  # Only the first idle tick of a stretch becomes an event.
+                self.record(TelemetryEvent.IDLE, tick, elevator.id, elevator.current_floor)
+
+    def events(self):
+        # Buffered events, oldest first, as (tick, TelemetryEvent, elevator id, floor).
+        start = max(0, self.count - self.capacity)
+        for n in range(start, self.count):
+            i = n % self.capacity
+            yield self.ticks[i], TelemetryEvent(self.kinds[i]), self.elevator_ids[i], self.floors[i]
+
+    def counters(self):
+        return {"events": self.count, "stops": self.stops, "travel_distance": self.travel_distance,
+                "idle_ticks": self.idle_ticks}
+
+    def close(self):
+        if self.export_file:
+            self.export_file.close()
+            self.export_file = None
+
 class ElevatorController:
-    def __init__(self, num_elevators, total_floors):
+    def __init__(self, num_elevators, total_floors, look_scheduling=False, cost_function=None, telemetry=None, verbose=False,
+                 capacity=8):
         # Initialize multiple elevators.
-        self.elevators = [Elevator(i, total_floors) for i in range(num_elevators)]
+        self.elevators = [Elevator(i, total_floors, look_scheduling, capacity) for i in range(num_elevators)]
         self.total_floors = total_floors
+        # With a cost function, hall calls go through the floor-indexed dispatcher instead of a linear scan.
+        self.dispatcher = FloorIndexedDispatcher(self.elevators, cost_function) if cost_function else None
+        self.telemetry = telemetry  # Optional Telemetry; None means no tracing at all.
+        self.verbose = verbose      # Print every assignment and every elevator on every step.
+        self.ticks = 0
 
-    def request_elevator(self, floor, direction):
+    def find_closest_elevator(self, floor, direction):
         # Find the closest elevator that is idle or moving in the desired direction.
         best_elevator = None
         best_distance = self.total_floors + 1  # Start with the worst possible distance.
 
         for elevator in self.elevators:
+            if elevator.load >= elevator.capacity:
+                continue  # A full car would stop and leave everybody behind.
             if elevator.direction == Direction.IDLE:
-                distance = abs(elevator.current_floor + floor)
+                distance = abs(elevator.current_floor - floor)
                 if distance < best_distance:
                     best_elevator = elevator
                     best_distance = distance
@@ -94,26 +340,827 @@ class ElevatorController:
                     distance = floor - elevator.current_floor
                 elif direction == Direction.DOWN and elevator.current_floor >= floor:
                     distance = elevator.current_floor - floor
+                else:
+                    continue  # Moving in our direction but already past the floor.
 
                 if distance < best_distance:
                     best_elevator = elevator
                     best_distance = distance
+        return best_elevator
+
+    def find_closest_elevators(self, calls):
+        # find_closest_elevator for many (floor, direction) calls with one pass over the fleet: the nearest car
+        # with room is kept per (direction, floor), and each call is answered with a bisect on those floors.
+        # Assigning a call neither moves a car nor changes its direction, so the answers are the ones
+        # find_closest_elevator would give call by call, including the lowest-id tie-break.
+        lowest_ids = {direction: {} for direction in Direction}  # direction -> floor -> lowest car id there
+        for elevator in self.elevators:
+            if elevator.load < elevator.capacity:
+                lowest_ids[elevator.direction].setdefault(elevator.current_floor, elevator.id)
+        floors = {direction: sorted(by_floor) for direction, by_floor in lowest_ids.items()}
+        idle_ids, idle_floors = lowest_ids[Direction.IDLE], floors[Direction.IDLE]
+        found = []
+        for floor, direction in calls:
+            i = bisect.bisect_left(idle_floors, floor)
+            candidates = [(abs(car_floor - floor), idle_ids[car_floor]) for car_floor in idle_floors[max(0, i - 1):i + 1]]
+            moving = floors[direction]
+            if direction == Direction.UP:
+                i = bisect.bisect_right(moving, floor)
+                if i:  # The highest UP car at or below the floor.
+                    candidates.append((floor - moving[i - 1], lowest_ids[direction][moving[i - 1]]))
+            elif direction == Direction.DOWN:
+                i = bisect.bisect_left(moving, floor)
+                if i < len(moving):  # The lowest DOWN car at or above the floor.
+                    candidates.append((moving[i] - floor, lowest_ids[direction][moving[i]]))
+            found.append(self.elevators[min(candidates)[1]] if candidates else None)
+        return found
 
+    def request_elevator(self, floor, direction):
+        if self.dispatcher:
+            best_elevator = self.dispatcher.find_elevator(floor, direction)
+        else:
+            best_elevator = self.find_closest_elevator(floor, direction)
+        self._assign(best_elevator, floor)
+        return best_elevator
+
+    def _assign(self, elevator, floor):
         # Assign the request to the best elevator found.
-        if best_elevator:
-            best_elevator.request_floor(floor)
-            print(f"Assigned elevator {best_elevator.id} to floor {floor}")
+        if elevator:
+            elevator.request_floor(floor)
+            if self.telemetry:
+                self.telemetry.record(TelemetryEvent.ASSIGN, self.ticks, elevator.id, floor)
+            if self.verbose:
+                print(f"Assigned elevator {elevator.id} to floor {floor}")
+
+    def request_elevators(self, calls):
+        # Batch of (floor, direction) hall calls, e.g. everything that arrived during one tick.
+        # Repeated presses of the same hall button are merged and the rest assigned in one sorted pass.
+        # The linear scan answers the whole batch in one pass over the fleet (find_closest_elevators); the
+        # dispatcher's cost functions see the stops earlier calls added, so it still decides call by call.
+        unique_calls = sorted(set(calls), key=lambda call: (call[1].value, call[0]))
+        if self.dispatcher:
+            return {call: self.request_elevator(*call) for call in unique_calls}
+        assignments = dict(zip(unique_calls, self.find_closest_elevators(unique_calls)))
+        for (floor, _), elevator in assignments.items():
+            self._assign(elevator, floor)
+        return assignments
 
     def step(self):
         # Simulate each elevator taking a step (moving one floor).
+        telemetry = self.telemetry
         for elevator in self.elevators:
+            if telemetry:
+                old_floor, old_pending, old_direction = elevator.current_floor, len(elevator.requests), elevator.direction
+            elevator.move()
+            if self.dispatcher:
+                self.dispatcher.update(elevator)
+            if telemetry:
+                telemetry.observe_move(self.ticks, elevator, old_floor, old_pending, old_direction)
+            if self.verbose:
+                print(elevator)
+        self.ticks += 1
+
+class FleetState:
+    # Array-backed fleet for very large what-if simulations (100k+ cars).
+    # Floors, directions, statuses and next targets live in parallel NumPy arrays (Enum values, -1 = no target),
+    # so one step of the whole fleet is a handful of vectorised operations instead of a Python loop of Elevator.move().
+    # Pending stops stay in plain lists with the same ordering rules as Elevator.requests, but they are only
+    # touched for the cars that are stopping this tick.
+    def __init__(self, num_elevators, total_floors, capacity=8):
+        if np is None:
+            raise ImportError("FleetState needs numpy: pip install numpy")
+        self.total_floors = total_floors
+        self.floors = np.zeros(num_elevators, dtype=np.int32)
+        self.directions = np.full(num_elevators, Direction.IDLE.value, dtype=np.int8)
+        self.statuses = np.full(num_elevators, Status.STOPPED.value, dtype=np.int8)
+        self.targets = np.full(num_elevators, -1, dtype=np.int32)
+        self.capacity = capacity
+        self.loads = np.zeros(num_elevators, dtype=np.int16)
+        self.pending = {}  # elevator id -> list of floors, only for cars that have requests
+        self.views = [ElevatorView(self, i) for i in range(num_elevators)]
+
+    def request_floor(self, i, floor):
+        # Same rules as Elevator.request_floor.
+        requests = self.pending.setdefault(i, [])
+        if floor not in requests:
+            requests.append(floor)
+        if self.directions[i] == Direction.UP.value:
+            requests.sort()
+        elif self.directions[i] == Direction.DOWN.value:
+            requests.sort(reverse=True)
+        self.targets[i] = requests[0]
+
+    def step(self):
+        # Vectorised equivalent of calling move() on every elevator. Returns the ids of cars that changed floor or direction.
+        has_target = self.targets >= 0
+        up = has_target & (self.targets > self.floors)
+        down = has_target & (self.targets < self.floors)
+        arrived = np.flatnonzero(has_target & (self.targets == self.floors))
+        old_directions = self.directions.copy()
+
+        self.floors += up
+        self.floors -= down
+        self.directions[up] = Direction.UP.value
+        self.directions[down] = Direction.DOWN.value
+        self.directions[~has_target] = Direction.IDLE.value
+        self.statuses[~has_target] = Status.STOPPED.value
+        self.statuses[arrived] = Status.STOPPED.value
+
+        for i in arrived.tolist():  # Only the cars stopping this tick need their request list.
+            requests = self.pending[i]
+            requests.pop(0)
+            if requests:
+                self.targets[i] = requests[0]
+            else:
+                self.targets[i] = -1
+                del self.pending[i]
+
+        self.statuses[self.targets >= 0] = Status.MOVING.value
+        return np.flatnonzero(up | down | (self.directions != old_directions))
+
+    def find_closest_elevator(self, floor, direction):
+        # Vectorised version of ElevatorController.find_closest_elevator (same tie-breaking: lowest id wins).
+        idle = self.directions == Direction.IDLE.value
+        if direction == Direction.UP:
+            same_way = (self.directions == Direction.UP.value) & (self.floors <= floor)
+        else:
+            same_way = (self.directions == Direction.DOWN.value) & (self.floors >= floor)
+        has_room = self.loads < self.capacity
+        distance = np.where((idle | same_way) & has_room, np.abs(self.floors - floor), self.total_floors + 1)
+        best = int(np.argmin(distance)) if len(distance) else 0
+        if not len(distance) or distance[best] > self.total_floors:
+            return None
+        return self.views[best]
+
+class ElevatorView:
+    # Elevator-like view of one row of a FleetState, so existing callers (the controller, dispatcher,
+    # EventDrivenSimulator, print) can keep using elevator.current_floor, elevator.direction, ...
+    __slots__ = ("fleet", "id")
+
+    def __init__(self, fleet, id):
+        self.fleet = fleet
+        self.id = id
+
+    @property
+    def current_floor(self):
+        return int(self.fleet.floors[self.id])
+
+    @current_floor.setter
+    def current_floor(self, floor):
+        self.fleet.floors[self.id] = floor
+
+    @property
+    def direction(self):
+        return Direction(int(self.fleet.directions[self.id]))
+
+    @direction.setter
+    def direction(self, direction):
+        self.fleet.directions[self.id] = direction.value
+
+    @property
+    def status(self):
+        return Status(int(self.fleet.statuses[self.id]))
+
+    @status.setter
+    def status(self, status):
+        self.fleet.statuses[self.id] = status.value
+
+    @property
+    def requests(self):
+        return self.fleet.pending.get(self.id, [])
+
+    @property
+    def total_floors(self):
+        return self.fleet.total_floors
+
+    @property
+    def capacity(self):
+        return self.fleet.capacity
+
+    @property
+    def load(self):
+        return int(self.fleet.loads[self.id])
+
+    @load.setter
+    def load(self, load):
+        self.fleet.loads[self.id] = load
+
+    def request_floor(self, floor):
+        self.fleet.request_floor(self.id, floor)
+
+    def next_floor(self):
+        target = int(self.fleet.targets[self.id])
+        return None if target < 0 else target
+
+    def move(self):
+        # Single-car step for callers that drive elevators one by one; FleetState.step() moves everyone at once.
+        requests = self.requests
+        if not requests:
+            self.direction = Direction.IDLE
+            self.status = Status.STOPPED
+            return
+        next_floor = requests[0]
+        if self.current_floor < next_floor:
+            self.direction = Direction.UP
+            self.current_floor += 1
+        elif self.current_floor > next_floor:
+            self.direction = Direction.DOWN
+            self.current_floor -= 1
+        else:
+            requests.pop(0)
+            if requests:
+                self.fleet.targets[self.id] = requests[0]
+            else:
+                self.fleet.targets[self.id] = -1
+                del self.fleet.pending[self.id]
+            self.status = Status.STOPPED
+        if self.requests:
+            self.status = Status.MOVING
+
+    def __str__(self):
+        return f"Elevator {self.id} at floor {self.current_floor}, direction: {self.direction}, status: {self.status}, requests: {self.requests}"
+
+class VectorizedElevatorController(ElevatorController):
+    # ElevatorController on top of a FleetState: same request_elevator/step API, but steps and
+    # linear-scan dispatch are vectorised and nothing is printed per car.
+    # A Telemetry only receives ASSIGN events (from _assign): per-car moves, stops and idles would defeat
+    # the vectorised step, so step() records none of them.
+    def __init__(self, num_elevators, total_floors, cost_function=None, capacity=8, telemetry=None):
+        super().__init__(0, total_floors, telemetry=telemetry, capacity=capacity)
+        self.fleet = FleetState(num_elevators, total_floors, capacity)
+        self.elevators = self.fleet.views
+        self.dispatcher = FloorIndexedDispatcher(self.elevators, cost_function) if cost_function else None
+
+    def find_closest_elevator(self, floor, direction):
+        return self.fleet.find_closest_elevator(floor, direction)
+
+    def step(self):
+        changed = self.fleet.step()
+        if self.dispatcher:
+            for i in changed.tolist():
+                self.dispatcher.update(self.elevators[i])
+        self.ticks += 1
+
+class EventType(Enum):
+    # Lower value wins on equal timestamps: hall calls of tick t are dispatched before tick t moves the cars.
+    ARRIVAL = 0  # A hall call arrives at the controller.
+    BATCH = 1    # A destination-dispatch window closes and its passengers are assigned.
+    STOP = 2     # An elevator reaches its next requested floor.
+    DOOR = 3     # Doors cycle at the floor and the request is cleared.
+
+class DestinationDispatcher:
+    # Destination dispatch: passengers key in their destination at the hall, so instead of one hall call per
+    # button press we collect everybody who arrives during a short `window` and assign whole groups:
+    # riders from the same origin, going the same way, to destinations at most `zone` floors apart, and no more
+    # than a car's capacity. Fewer, fuller cars with fewer intermediate stops beat nearest-car under up-peak.
+    def __init__(self, window=5, zone=1):
+        self.window = window
+        self.zone = zone
+
+    def group(self, passengers, capacity):
+        by_origin = {}
+        for passenger in passengers:
+            key = (passenger.origin, passenger.destination > passenger.origin)
+            by_origin.setdefault(key, []).append(passenger)
+        groups = []
+        for riders in by_origin.values():
+            riders.sort(key=lambda passenger: passenger.destination)
+            group = []
+            for passenger in riders:
+                if group and (len(group) == capacity or passenger.destination - group[0].destination > self.zone):
+                    groups.append(group)
+                    group = []
+                group.append(passenger)
+            groups.append(group)
+        return groups
+
+    def cost(self, elevator, group, committed):
+        # Travel to the origin + queued door ticks + the stops this group adds, or None if the car can't take it:
+        # it would have to turn around (same rule as the hall-call heuristic) or the group does not fit.
+        origin = group[0].origin
+        going_up = group[0].destination > origin
+        if elevator.direction == Direction.UP and not (going_up and elevator.current_floor <= origin):
+            return None
+        if elevator.direction == Direction.DOWN and not (not going_up and elevator.current_floor >= origin):
+            return None
+        if committed + len(group) > elevator.capacity:
+            return None
+        new_stops = len({passenger.destination for passenger in group if passenger.destination not in elevator.requests})
+        if origin not in elevator.requests:
+            new_stops += 1
+        # Every extra stop delays everybody who will be on board, so weigh it by the riders it affects.
+        return abs(elevator.current_floor - origin) + len(elevator.requests) + new_stops * (committed + len(group))
+
+    def assign(self, passengers, elevators, committed):
+        # Returns (elevator, group) pairs plus the passengers no car could take this window.
+        # `committed` (elevator id -> riders on board or promised) is updated in place.
+        assignments, left_over = [], []
+        for group in self.group(passengers, elevators[0].capacity):
+            costs = [(cost, e.id, e) for e in elevators if (cost := self.cost(e, group, committed[e.id])) is not None]
+            if not costs:
+                left_over.extend(group)
+                continue
+            _, _, elevator = min(costs, key=lambda c: c[:2])
+            committed[elevator.id] += len(group)
+            assignments.append((elevator, group))
+        return assignments, left_over
+
+class Passenger:
+    # One rider in a simulation: a hall call at `origin` followed by a car call to `destination`.
+    __slots__ = ("origin", "destination", "arrived", "boarded", "alighted", "elevator_id")
+
+    def __init__(self, origin, destination, arrived):
+        self.origin = origin
+        self.destination = destination
+        self.arrived = arrived   # Tick of the hall call
+        self.boarded = None      # Door tick of the car that picked the passenger up
+        self.alighted = None     # Door tick at the destination
+        self.elevator_id = None  # Car the passenger rode in
+
+class EventDrivenSimulator:
+    # Discrete-event version of "call controller.step() in a loop".
+    # Instead of moving every elevator one floor per tick, we keep a heap of (tick, event, ...) and
+    # jump straight to the next tick where something happens. Between events an elevator only travels
+    # in a straight line towards its next floor, so its state can be fast-forwarded in O(1).
+    # Tick semantics match the tick loop exactly: "state at tick t" = state after t calls to step().
+    def __init__(self, controller, destination_dispatcher=None):
+        self.controller = controller
+        self.destination_dispatcher = destination_dispatcher  # Optional DestinationDispatcher for passengers
+        self.now = 0
+        self.events = []                                     # Heap of (tick, event type, order, seq, payload)
+        self.seq = 0                                         # Tie breaker so payloads are never compared
+        self.synced_at = {e.id: 0 for e in controller.elevators}  # Tick up to which each elevator is simulated
+        self.version = {e.id: 0 for e in controller.elevators}    # Invalidates stale STOP/DOOR events
+        self.assignments = []                                # (tick, floor, elevator id)
+        self.stops = []                                      # (tick, elevator id, floor) in the order served
+        self.waiting = {}                                    # (elevator id, floor) -> passengers to pick up
+        self.riding = {}                                     # (elevator id, floor) -> passengers to drop off
+        self.finished = []                                   # Passengers who reached their destination
+        self.retries = 0                                     # Hall calls re-placed (no car accepted, or car was full)
+        self.committed = {e.id: 0 for e in controller.elevators}  # Riders on board or waiting for each car
+        self.batch = []                                      # Passengers waiting for the destination-dispatch window
+
+    def _push(self, tick, event_type, order, payload):
+        heapq.heappush(self.events, (tick, event_type.value, order, self.seq, payload))
+        self.seq += 1
+
+    def add_call(self, tick, floor, direction):
+        # Calls of the same tick are dispatched in the order they were added.
+        self._push(tick, EventType.ARRIVAL, self.seq, (floor, direction, None))
+
+    def add_passenger(self, tick, origin, destination):
+        # A hall call that also boards a rider, who then presses `destination` inside the car.
+        direction = Direction.UP if destination > origin else Direction.DOWN
+        passenger = Passenger(origin, destination, tick)
+        self._push(tick, EventType.ARRIVAL, self.seq, (origin, direction, passenger))
+        return passenger
+
+    def _sync(self, elevator, tick):
+        # Fast-forward the elevator to `tick` without a per-floor loop.
+        # Events are scheduled at every stop, so the jump never crosses one.
+        ticks = tick - self.synced_at[elevator.id]
+        self.synced_at[elevator.id] = tick
+        if ticks <= 0:
+            return
+        telemetry = self.controller.telemetry
+        if not elevator.requests:
+            if telemetry:
+                telemetry.idle_ticks += ticks
+                if elevator.direction != Direction.IDLE:
+                    telemetry.record(TelemetryEvent.IDLE, tick - ticks, elevator.id, elevator.current_floor)
+            elevator.direction = Direction.IDLE
+            elevator.status = Status.STOPPED
+        elif elevator.current_floor < elevator.next_floor():
+            elevator.direction = Direction.UP
+            elevator.current_floor += ticks
+            elevator.status = Status.MOVING
+        else:
+            elevator.direction = Direction.DOWN
+            elevator.current_floor -= ticks
+            elevator.status = Status.MOVING
+        if telemetry and elevator.requests:
+            telemetry.travel_distance += ticks
+        if self.controller.dispatcher:
+            self.controller.dispatcher.update(elevator)
+
+    def _schedule(self, elevator):
+        # (Re)compute the next STOP and DOOR event of an elevator synced to the current tick.
+        self.version[elevator.id] += 1
+        if not elevator.requests:
+            return
+        start = self.synced_at[elevator.id]
+        distance = abs(elevator.next_floor() - elevator.current_floor)
+        payload = (elevator.id, self.version[elevator.id])
+        if distance:
+            self._push(start + distance - 1, EventType.STOP, elevator.id, payload)
+        # Ordered by elevator id on equal ticks, just like step() walks the elevator list.
+        self._push(start + distance, EventType.DOOR, elevator.id, payload)
+
+    def _exchange_passengers(self, elevator, floor, tick):
+        # Doors are open at `floor`: riders for this floor leave, waiting riders board and press their floor.
+        # Whoever does not fit into the car presses the hall button again on the next tick.
+        for passenger in self.riding.pop((elevator.id, floor), []):
+            passenger.alighted = tick
+            elevator.load -= 1
+            self.committed[elevator.id] -= 1
+            self.finished.append(passenger)
+        waiting = self.waiting.pop((elevator.id, floor), [])
+        room = elevator.capacity - elevator.load
+        for passenger in waiting[:room]:
+            passenger.boarded = tick
+            passenger.elevator_id = elevator.id
+            elevator.load += 1
+            elevator.request_floor(passenger.destination)
+            self.riding.setdefault((elevator.id, passenger.destination), []).append(passenger)
+        for passenger in waiting[room:]:
+            self.committed[elevator.id] -= 1
+            self._retry(tick, passenger)
+
+    def _retry(self, tick, passenger):
+        self.retries += 1
+        direction = Direction.UP if passenger.destination > passenger.origin else Direction.DOWN
+        self._push(tick + 1, EventType.ARRIVAL, self.seq, (passenger.origin, direction, passenger))
+
+    def _dispatch_batch(self, tick, elevators):
+        for elevator in elevators:
+            self._sync(elevator, tick)
+        assignments, left_over = self.destination_dispatcher.assign(self.batch, self.controller.elevators, self.committed)
+        self.batch = []
+        for passenger in left_over:  # Try again in the next window.
+            self._retry(tick, passenger)
+        telemetry = self.controller.telemetry
+        for elevator, group in assignments:
+            origin = group[0].origin
+            elevator.request_floor(origin)
+            if telemetry:
+                telemetry.record(TelemetryEvent.ASSIGN, tick, elevator.id, origin)
+            self.assignments.append((tick, origin, elevator.id))
+            self.waiting.setdefault((elevator.id, origin), []).extend(group)
+            self._schedule(elevator)
+
+    def run(self, until=None):
+        # Process every event before `until`, leaving the controller as if step() had been called `until` times.
+        # Without `until` the simulation runs until every event has been handled.
+        elevators = {e.id: e for e in self.controller.elevators}
+        while self.events and (until is None or self.events[0][0] < until):
+            tick, event_type, _, _, payload = heapq.heappop(self.events)
+            self.now = self.controller.ticks = tick
+            if event_type == EventType.ARRIVAL.value:
+                floor, direction, passenger = payload
+                if passenger and self.destination_dispatcher:
+                    if not self.batch:  # First passenger of a new window.
+                        self._push(tick + self.destination_dispatcher.window, EventType.BATCH, 0, None)
+                    self.batch.append(passenger)
+                    continue
+                for elevator in elevators.values():
+                    self._sync(elevator, tick)  # Dispatch looks at every car, so all must be current.
+                elevator = self.controller.request_elevator(floor, direction)
+                if elevator:
+                    self.assignments.append((tick, floor, elevator.id))
+                    if passenger:
+                        self.committed[elevator.id] += 1
+                        self.waiting.setdefault((elevator.id, floor), []).append(passenger)
+                    self._schedule(elevator)
+                elif passenger:
+                    self._retry(tick, passenger)  # Nobody can take the call yet; the button stays lit.
+                continue
+            if event_type == EventType.BATCH.value:
+                self._dispatch_batch(tick, elevators.values())
+                continue
+
+            elevator_id, version = payload
+            if version != self.version[elevator_id]:
+                continue  # Requests changed after this event was scheduled.
+            elevator = elevators[elevator_id]
+            if event_type == EventType.STOP.value:
+                self._sync(elevator, tick + 1)  # The elevator lands on the floor during this tick.
+            else:
+                self._sync(elevator, tick)
+                floor = elevator.next_floor()
+                elevator.move()  # The door tick is a single ordinary step that clears the request.
+                self.synced_at[elevator_id] = tick + 1
+                self.stops.append((tick, elevator_id, floor))
+                if self.controller.telemetry:
+                    self.controller.telemetry.stops += 1
+                    self.controller.telemetry.record(TelemetryEvent.STOP, tick, elevator_id, floor)
+                self._exchange_passengers(elevator, floor, tick)
+                self._schedule(elevator)
+
+        if until is not None:
+            for elevator in elevators.values():
+                self._sync(elevator, until)
+            self.now = self.controller.ticks = until
+        return self.stops
+
+def run_tick_simulation(controller, calls, until):
+    # Reference tick loop for the EventDrivenSimulator: same (tick, floor, direction) calls, same
+    # assignments and stop order, but the whole fleet moves one floor per tick through controller.step(),
+    # so telemetry is fed exactly as in a plain step() loop.
+    pending = sorted(calls, key=lambda call: call[0])
+    assignments, stops = [], []
+    index = 0
+    for tick in range(until):
+        controller.ticks = tick
+        while index < len(pending) and pending[index][0] == tick:
+            _, floor, direction = pending[index]
+            elevator = controller.request_elevator(floor, direction)
+            if elevator:
+                assignments.append((tick, floor, elevator.id))
+            index += 1
+        # Cars do not affect each other while moving, so the stops of this tick can be read before the step.
+        for elevator in controller.elevators:
+            if elevator.requests and elevator.next_floor() == elevator.current_floor:
+                stops.append((tick, elevator.id, elevator.current_floor))
+        controller.step()
+    return assignments, stops
+
+def check_telemetry_parity(runs=200, num_elevators=4, total_floors=20, until=200, seed=0):
+    # The event-driven simulator skips idle ticks but must report what the step() loop reports:
+    # the same assignments and stops, the same telemetry counters and the same buffered events.
+    # The vectorised controller must make the same assignments and trace exactly their ASSIGN events.
+    rng = random.Random(seed)
+    for _ in range(runs):
+        calls = [(rng.randrange(until - 40), rng.randrange(total_floors), rng.choice((Direction.UP, Direction.DOWN)))
+                 for _ in range(rng.randrange(1, 30))]
+        cost_function = rng.choice((None, nearest_car_cost, eta_cost))
+        tick_controller = ElevatorController(num_elevators, total_floors, cost_function=cost_function,
+                                             telemetry=Telemetry())
+        assignments, stops = run_tick_simulation(tick_controller, calls, until)
+        event_controller = ElevatorController(num_elevators, total_floors, cost_function=cost_function,
+                                              telemetry=Telemetry())
+        simulator = EventDrivenSimulator(event_controller)
+        for tick, floor, direction in sorted(calls, key=lambda call: call[0]):
+            simulator.add_call(tick, floor, direction)
+        assert simulator.run(until=until) == stops and simulator.assignments == assignments
+        assert event_controller.telemetry.counters() == tick_controller.telemetry.counters()
+        event_key = lambda event: (event[0], event[1].value, event[2], event[3])
+        assert (sorted(event_controller.telemetry.events(), key=event_key) ==
+                sorted(tick_controller.telemetry.events(), key=event_key))
+        vectorized_controller = VectorizedElevatorController(num_elevators, total_floors, cost_function=cost_function,
+                                                             telemetry=Telemetry())
+        assert run_tick_simulation(vectorized_controller, calls, until)[0] == assignments
+        assert (list(vectorized_controller.telemetry.events()) ==
+                [event for event in tick_controller.telemetry.events() if event[1] == TelemetryEvent.ASSIGN])
+    print(f"Telemetry: EventDrivenSimulator matches the step() loop on {runs} random call sequences, "
+          f"VectorizedElevatorController traces the same assignments")
+
+class AsyncElevatorController:
+    # asyncio front end for an ElevatorController that takes hall calls while the cars are moving.
+    # - every car is its own task that moves one floor per tick and sleeps on an Event when it has nothing to do
+    # - hall calls from any number of producer coroutines go onto one asyncio.Queue
+    # - a single dispatcher task drains the queue, so assignments are serialised without any lock:
+    #   everything runs on one event loop and no task awaits in the middle of reading/updating elevator state.
+    # - a call no car can take yet (all full or moving away) stays lit in `pending`, merged with later presses of
+    #   the same button, and is retried whenever a car changes direction or goes idle, like
+    #   EventDrivenSimulator._retry; join() only returns once every call has been assigned.
+    def __init__(self, num_elevators, total_floors, cost_function=nearest_car_cost, tick_seconds=0.01):
+        self.controller = ElevatorController(num_elevators, total_floors, cost_function=cost_function)
+        self.tick_seconds = tick_seconds
+        self.calls = asyncio.Queue()
+        self.wakeups = {elevator.id: asyncio.Event() for elevator in self.controller.elevators}
+        self.tasks = []
+        self.assigned = 0
+        self.retries = 0    # Times a waiting call was tried again
+        self.pending = {}   # (floor, direction) -> presses not assigned yet, oldest button first
+        self.retry_queued = False
+
+    async def request_elevator(self, floor, direction):
+        await self.calls.put((floor, direction))
+
+    async def _dispatch(self):
+        controller = self.controller
+        while True:
+            batch = [await self.calls.get()]
+            while not self.calls.empty() and len(batch) < 1024:  # Drain whatever else is already queued.
+                batch.append(self.calls.get_nowait())
+            self.retries += len(self.pending)
+            for call in batch:
+                if call is None:  # A car turned around or went idle: only the waiting calls need another try.
+                    self.retry_queued = False
+                    self.calls.task_done()
+                else:
+                    self.pending[call] = self.pending.get(call, 0) + 1
+            for (floor, direction), presses in list(self.pending.items()):
+                if controller.dispatcher:
+                    elevator = controller.dispatcher.find_elevator(floor, direction)
+                else:
+                    elevator = controller.find_closest_elevator(floor, direction)
+                if elevator:
+                    elevator.request_floor(floor)
+                    self.wakeups[elevator.id].set()
+                    del self.pending[floor, direction]
+                    self.assigned += presses
+                    for _ in range(presses):
+                        self.calls.task_done()
+
+    async def _run_elevator(self, elevator):
+        wakeup = self.wakeups[elevator.id]
+        dispatcher = self.controller.dispatcher
+        while True:
+            old_direction = elevator.direction
             elevator.move()
-            print(elevator)
+            if dispatcher:
+                dispatcher.update(elevator)
+            if elevator.direction != old_direction and self.pending and not self.retry_queued:
+                self.retry_queued = True
+                self.calls.put_nowait(None)  # Wake the dispatcher to retry the calls that are still lit.
+            if elevator.direction == Direction.IDLE:
+                wakeup.clear()
+                await wakeup.wait()
+            else:
+                await asyncio.sleep(self.tick_seconds)
+
+    async def start(self):
+        self.tasks = [asyncio.create_task(self._dispatch())]
+        self.tasks += [asyncio.create_task(self._run_elevator(e)) for e in self.controller.elevators]
+
+    async def join(self):
+        # Wait until every hall call has been assigned, including the ones still waiting for a car.
+        await self.calls.join()
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+async def benchmark_async_controller(num_producers=100, calls_per_producer=1000, num_elevators=16, total_floors=50):
+    # Load generator: many producer coroutines fire hall calls as fast as they can while the cars keep moving.
+    elevator_system = AsyncElevatorController(num_elevators, total_floors)
+    await elevator_system.start()
+
+    async def producer(seed):
+        rng = random.Random(seed)
+        for _ in range(calls_per_producer):
+            await elevator_system.request_elevator(rng.randrange(total_floors), rng.choice((Direction.UP, Direction.DOWN)))
+            if rng.random() < 0.1:
+                await asyncio.sleep(0)  # Yield now and then, like a real network handler would.
+
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(seed) for seed in range(num_producers)))
+    await elevator_system.join()
+    elapsed = time.perf_counter() - start
+    await elevator_system.stop()
+    total = num_producers * calls_per_producer
+    assigned = elevator_system.assigned
+    assert assigned == total and not elevator_system.pending
+    print(f"{total} hall calls from {num_producers} producers, all assigned in {elapsed:.2f}s: "
+          f"{assigned / elapsed:,.0f} assigned calls/s ({elevator_system.retries} retries of waiting calls)")
+    return assigned / elapsed
+
+# Seeded traffic generators for the scenario runner: each returns sorted (tick, origin, destination) trips.
+# Arrivals are a Poisson process with `rate` passengers per tick.
+def _arrival_ticks(rng, duration, rate):
+    tick = rng.expovariate(rate)
+    while tick < duration:
+        yield int(tick)
+        tick += rng.expovariate(rate)
+
+def _other_floor(rng, total_floors, floor):
+    destination = rng.randrange(total_floors - 1)
+    return destination if destination < floor else destination + 1
+
+def up_peak_traffic(rng, total_floors, duration, rate):
+    # Morning: almost everyone enters at the lobby and goes up.
+    trips = []
+    for tick in _arrival_ticks(rng, duration, rate):
+        origin = 0 if rng.random() < 0.9 else rng.randrange(total_floors)
+        trips.append((tick, origin, _other_floor(rng, total_floors, origin)))
+    return trips
+
+def lunch_traffic(rng, total_floors, duration, rate):
+    # Lunch: half the trips go down to the lobby, half come back up from it.
+    trips = []
+    for tick in _arrival_ticks(rng, duration, rate):
+        floor = rng.randrange(1, total_floors)
+        trips.append((tick, floor, 0) if rng.random() < 0.5 else (tick, 0, floor))
+    return trips
+
+def inter_floor_traffic(rng, total_floors, duration, rate):
+    # Off-peak: uniformly random origin and destination.
+    trips = []
+    for tick in _arrival_ticks(rng, duration, rate):
+        origin = rng.randrange(total_floors)
+        trips.append((tick, origin, _other_floor(rng, total_floors, origin)))
+    return trips
+
+TRAFFIC_PATTERNS = {
+    "up_peak": up_peak_traffic,
+    "lunch": lunch_traffic,
+    "inter_floor": inter_floor_traffic,
+}
+
+DISPATCH_POLICIES = {
+    "linear_scan": None,  # ElevatorController.find_closest_elevator
+    "nearest_car": nearest_car_cost,
+    "eta": eta_cost,
+    "load_aware": load_aware_cost,
+}
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list: the value at rank ceil(p% of n), counting from 1.
+    # p * n is multiplied before dividing, so whole ranks such as p7 of 100 are not pushed up by float error.
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(p * len(sorted_values) / 100) - 1))
+    return sorted_values[rank]
+
+def run_scenario(pattern, policy, seed, run, num_elevators, total_floors, duration, rate):
+    # One independent simulation. The traffic only depends on (seed, pattern, run), so every policy
+    # sees exactly the same passengers and results are reproducible across processes.
+    rng = random.Random(f"{seed}:{pattern}:{run}")
+    controller = ElevatorController(num_elevators, total_floors, cost_function=DISPATCH_POLICIES[policy])
+    simulator = EventDrivenSimulator(controller)
+    for tick, origin, destination in TRAFFIC_PATTERNS[pattern](rng, total_floors, duration, rate):
+        simulator.add_passenger(tick, origin, destination)
+    simulator.run()
+    waits = [p.boarded - p.arrived for p in simulator.finished]
+    journeys = [p.alighted - p.arrived for p in simulator.finished]
+    return pattern, policy, waits, journeys, simulator.retries
+
+def run_scenarios(patterns=TRAFFIC_PATTERNS, policies=DISPATCH_POLICIES, runs=8, seed=0, num_elevators=8,
+                  total_floors=40, duration=3600, rate=0.5, workers=None):
+    # Monte Carlo capacity planning: every (pattern, policy, run) is an independent simulation fanned out
+    # over a process pool, then wait and journey times are aggregated per (pattern, policy).
+    tasks = [(pattern, policy, seed, run, num_elevators, total_floors, duration, rate)
+             for pattern in patterns for policy in policies for run in range(runs)]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_scenario, *task) for task in tasks]
+        for future in futures:  # Collected in submission order, so aggregation is deterministic.
+            pattern, policy, waits, journeys, retries = future.result()
+            totals = results.setdefault((pattern, policy), {"waits": [], "journeys": [], "retries": 0})
+            totals["waits"].extend(waits)
+            totals["journeys"].extend(journeys)
+            totals["retries"] += retries
+
+    summary = {}
+    for key, totals in results.items():
+        waits, journeys = sorted(totals["waits"]), sorted(totals["journeys"])
+        summary[key] = {
+            "passengers": len(waits),
+            "retries": totals["retries"],
+            "wait_p50": percentile(waits, 50), "wait_p90": percentile(waits, 90), "wait_p99": percentile(waits, 99),
+            "journey_p50": percentile(journeys, 50), "journey_p90": percentile(journeys, 90),
+            "journey_p99": percentile(journeys, 99),
+        }
+    return summary
+
+def stops_per_trip(simulator):
+    # Average number of stops a passenger sits through between boarding and alighting (their own stop included).
+    stop_ticks = {}
+    for tick, elevator_id, _ in simulator.stops:
+        stop_ticks.setdefault(elevator_id, []).append(tick)
+    total = 0
+    for passenger in simulator.finished:
+        ticks = stop_ticks[passenger.elevator_id]
+        total += bisect.bisect_right(ticks, passenger.alighted) - bisect.bisect_right(ticks, passenger.boarded)
+    return total / max(1, len(simulator.finished))
+
+def benchmark_destination_dispatch(num_elevators=6, total_floors=30, duration=1800, rate=0.6, capacity=8, seed=0):
+    # Up-peak traffic through the conventional direction-plus-distance heuristic and through destination dispatch.
+    trips = up_peak_traffic(random.Random(seed), total_floors, duration, rate)
+    results = {}
+    for name, destination_dispatcher in (("direction+distance", None), ("destination", DestinationDispatcher())):
+        controller = ElevatorController(num_elevators, total_floors, capacity=capacity)
+        simulator = EventDrivenSimulator(controller, destination_dispatcher)
+        for trip in trips:
+            simulator.add_passenger(*trip)
+        start = time.perf_counter()
+        simulator.run()
+        elapsed = time.perf_counter() - start
+        journeys = sorted(p.alighted - p.arrived for p in simulator.finished)
+        results[name] = {
+            "passengers": len(simulator.finished),
+            "stops_per_trip": round(stops_per_trip(simulator), 2),
+            "mean_wait": round(sum(p.boarded - p.arrived for p in simulator.finished) / len(journeys), 1),
+            "mean_journey": round(sum(journeys) / len(journeys), 1),
+            "journey_p90": percentile(journeys, 90),
+            "seconds": round(elapsed, 2),
+        }
+        print(f"{name:20} {results[name]}")
+    return results
 
 if __name__ == "__main__":
+    if "--self-test" in sys.argv:
+        # python elevator_system.py --self-test
+        check_telemetry_parity()
+        sys.exit()
+    if "--scenarios" in sys.argv:
+        # python elevator_system.py --scenarios
+        for (pattern, policy), stats in sorted(run_scenarios().items()):
+            print(f"{pattern:12} {policy:12} {stats}")
+        sys.exit()
+    if "--destination-benchmark" in sys.argv:
+        benchmark_destination_dispatch()
+        sys.exit()
+    if "--async-benchmark" in sys.argv:
+        asyncio.run(benchmark_async_controller())
+        sys.exit()
+
     num_elevators = 3
     total_floors = 10
-    controller = ElevatorController(3, 10)
+    controller = ElevatorController(3, 10, telemetry=Telemetry(), verbose=True)
 
     # Requests coming in
     controller.request_elevator(3, Direction.UP)
@@ -124,6 +1171,14 @@ if __name__ == "__main__":
     for _ in range(10):
         controller.step()
 
+    # Same calls on the event-driven engine: only ticks with an arrival, stop or door event are visited.
+    simulator = EventDrivenSimulator(ElevatorController(num_elevators, total_floors))
+    simulator.add_call(0, 3, Direction.UP)
+    simulator.add_call(0, 5, Direction.UP)
+    simulator.add_call(0, 7, Direction.DOWN)
+    print(f"Stops (tick, elevator, floor): {simulator.run(until=10)}")
+    print(f"Telemetry: {controller.telemetry.counters()}")
+
 
 
 """
@@ -132,8 +1187,16 @@ Explanation:
 Classes, Interfaces, and Enumerations:
 The Elevator class represents an individual elevator and contains attributes such as current floor, direction, and status. It also manages the requests to visit floors and handles the logic for moving the elevator between floors.
 The ElevatorController class manages multiple elevators. It is responsible for receiving floor requests and assigning them to the most suitable elevator based on direction, distance, and current requests. It also simulates elevator movement.
+The LookRequestQueue is an optional per-elevator request structure (up-heap, down-heap and a membership set) that serves stops in LOOK order with O(log n) inserts and removals.
+The FloorIndexedDispatcher is an optional replacement for the linear scan in request_elevator. It keeps cars in sorted (floor, id) lists per direction, visits the eligible cars nearest first with bisect and ranks them with a pluggable cost function (nearest_car_cost, eta_cost, load_aware_cost), stopping as soon as no farther car can be cheaper.
+The FleetState stores a whole fleet in parallel NumPy arrays (floors, directions, statuses, next targets) and steps it with vectorised operations. ElevatorView exposes one row as an Elevator-like object and VectorizedElevatorController plugs both into the controller API.
 The Direction enum defines the possible directions an elevator can move (UP, DOWN, IDLE).
 The Status enum defines the operational states of the elevator (MOVING, STOPPED, MAINTENANCE).
 The system simulates elevator movement through repeated calls to the `step()` method, which moves each elevator one step at a time towards its destination.
+The EventDrivenSimulator is a discrete-event alternative to the step() loop. It keeps a heap of ARRIVAL, STOP and DOOR events keyed by tick and fast-forwards elevators between them, producing the same assignments and stop order while skipping the idle ticks.
+Elevators have a capacity and a load. The DestinationDispatcher batches passengers (who key in their destination at the hall) over a short window and assigns groups with the same origin and nearby destinations to one car within its capacity, cutting stops per trip under up-peak.
+The AsyncElevatorController runs each car as an asyncio task and takes hall calls from any number of producers through an asyncio.Queue; a single dispatcher task serialises assignments, so no lock is needed.
+Telemetry replaces per-step printing: a fixed-size ring buffer of compact (tick, event, elevator, floor) records, counters for stops, travel distance and idle ticks, and an optional sampled JSON-lines exporter. Printing is opt-in through verbose=True.
+run_scenarios is a Monte Carlo capacity-planning entry point: seeded traffic generators (up-peak, lunch, inter-floor) drive independent EventDrivenSimulator runs per dispatch policy on a ProcessPoolExecutor, and wait/journey-time percentiles are aggregated per (pattern, policy).
 
 """
\ No newline at end of file
@@ -10,7 +10,19 @@ The system should handle multiple entry and exit points and support concurrent a
 """
 from enum import Enum
 from abc import ABC
+from array import array
+from collections import deque
+import heapq
+import itertools
+import json
+import mmap
+import os
+import random
+import struct
+import subprocess
+import sys
 import threading
+import time
 
 
 class VehicleType(Enum):
@@ -45,6 +57,9 @@ class Truck(Vehicle):
         super().__init__(VehicleType.TRUCK, registrationNumber)
 
 
+VEHICLE_CLASSES = {VehicleType.CAR: Car, VehicleType.MOTORCYCLE: Motorcycle, VehicleType.TRUCK: Truck}
+
+
 class ParkingLot:
     _lock = threading.Lock()
     _instance = None
@@ -52,6 +67,9 @@ class ParkingLot:
     # Applying Singleton Design Pattern - Only one instance of ParkingLot is created and shared across the system.
     def __init__(self):
         self.levels = []
+        self.vehicleLevels = {}  # registrationNumber -> Level the vehicle is parked on
+        self.arrivals = {}       # registrationNumber -> claim of the gate currently parking it
+        self.journal = None      # Optional ParkingLotJournal that makes the state survive restarts
 
     @staticmethod
     def get_instance():
@@ -65,48 +83,198 @@ class ParkingLot:
     def addLevel(self, level):
         # Applying Open/Closed Principle (OCP) - The system is open for extension (adding more levels)
         # but closed for modification of existing code structure.
+        if self.journal:
+            self.journal.checkLevel(level)
+        level.levelIndex = len(self.levels)
+        level.journal = self.journal
         self.levels.append(level)
+        if self.journal:
+            self.journal.snapshot(self)  # The log refers to levels by index, so the layout must be on disk first.
 
-    def parkVehicle(self, vehicle):
+    def enableJournal(self, journal):
+        # From now on every park/unpark is appended to the journal (from inside the level's lock,
+        # so the log order matches the order in which spots really changed hands).
+        self.journal = journal
+        for level in self.levels:
+            level.journal = journal
+        if not journal.hasSnapshot():
+            journal.snapshot(self)
+
+    def parkVehicle(self, vehicle, gate=None):
         # This method is open to adding more functionality (such as more levels or vehicle types)
         # without changing its core behavior, supporting OCP.
-        for level in self.levels:
-            level.parkVehicle(vehicle)
-            return True
-        return False
+        # Falls through to the next level when a level has no free spot of the vehicle's type.
+        # `gate` is the entry gate the vehicle came through; gate-aware levels use it to pick the nearest spot.
+        # A registration that is already parked, or being parked at another gate, is turned away: the
+        # registration number is the key of every index, so one vehicle can only ever hold one spot.
+        registrationNumber = vehicle.registrationNumber
+        claim = object()
+        if self.arrivals.setdefault(registrationNumber, claim) is not claim:  # Atomic check-and-claim.
+            return False
+        try:
+            if registrationNumber in self.vehicleLevels:
+                return False
+            for level in self.levels:
+                if level.parkVehicle(vehicle, gate):
+                    self.vehicleLevels[registrationNumber] = level
+                    if self.journal:
+                        self.journal.maybeSnapshot(self)
+                    return True
+            return False
+        finally:
+            del self.arrivals[registrationNumber]
 
     def unparkVehicle(self, vehicle):
-        for level in self.levels:
-            level.unparkVehicle(vehicle)
+        # O(1): the reverse index says which level (and that level which spot) holds the vehicle.
+        level = self.vehicleLevels.get(vehicle.registrationNumber)
+        if level and level.unparkVehicle(vehicle):
+            del self.vehicleLevels[vehicle.registrationNumber]
+            if self.journal:
+                self.journal.maybeSnapshot(self)
             return True
         return False
 
+    def findVehicle(self, registrationNumber):
+        # "Where is my car?" at the exit gate: (level floor, spot number) or None, without scanning any spot.
+        level = self.vehicleLevels.get(registrationNumber)
+        if not level:
+            return None
+        return level.floor, level.parkedSpots[registrationNumber]
+
     def displayAvailableSpots(self):
         # This method displays the available parking spots at each level.
         for level in self.levels:
             level.displayAvailableSpots()
 
+    def getAvailability(self):
+        # Real-time snapshot for display boards and status endpoints: free spots per level and vehicle type.
+        # Reads the O(1) counters each level maintains on park/unpark, never the spots themselves, so it can be
+        # polled thousands of times per second. Counters are read without locks: each number is exact at the
+        # moment it is read, which is all a display board needs.
+        levels = {level.floor: {vehicleType.name: count for vehicleType, count in level.availableCounts.items()}
+                  for level in self.levels}
+        totals = {vehicleType.name: sum(counts[vehicleType.name] for counts in levels.values())
+                  for vehicleType in VehicleType}
+        return {"levels": levels, "total": totals}
+
+    def getAvailableCount(self, vehicleType, floor=None):
+        return sum(level.availableCounts[vehicleType] for level in self.levels if floor is None or level.floor == floor)
+
 
 class Level:
     # Level class adheres to Single Responsibility Principle (SRP) - only manages parking spots on a specific level.
-    def __init__(self, floor: int, numberOfSpots: int):
+    def __init__(self, floor: int, numberOfSpots: int, spotTypes=None):
+        # spotTypes optionally gives the VehicleType of every spot; by default all spots are for cars.
         self.floor = floor
         self.parkingSpots = [ParkingSpot(i) for i in range(numberOfSpots)]
+        if spotTypes:
+            for spot, vehicleType in zip(self.parkingSpots, spotTypes):
+                spot.vehicleType = vehicleType
+        self._buildFreeLists()
+        self.parkedSpots = {}  # registrationNumber -> spot number, so unparking needs no scan
+        # Lock striping: one lock per vehicle type on this level, so gates parking different vehicle types
+        # (or on different levels) never wait for each other, and a spot can never be handed out twice.
+        self.locks = {vehicleType: threading.Lock() for vehicleType in VehicleType}
+        self.contentions = 0  # How often a gate found its stripe already locked (approximate, for benchmarks)
+        self.levelIndex = None  # Position in ParkingLot.levels, set by addLevel
+        self.journal = None
 
-    def parkVehicle(self, vehicle):
-        # This method adheres to SRP by being responsible for parking vehicles in appropriate spots.
+    def _buildFreeLists(self):
+        # Free spot numbers per vehicle type, as min-heaps so the lowest-numbered spot is handed out first.
+        # Parking pops in O(log n) instead of scanning every spot; a spot taken behind the level's back
+        # (spot.parkVehicle called directly) is skipped lazily when it reaches the top of the heap.
+        self.freeSpots = {vehicleType: [] for vehicleType in VehicleType}
         for spot in self.parkingSpots:
-            if spot.isAvailable() and spot.vehicleType == vehicle.vehicleType:
-                spot.parkVehicle(vehicle)
-                return True
+            if spot.isAvailable():
+                self.freeSpots[spot.vehicleType].append(spot.spotNumber)  # Already in ascending order, i.e. a valid heap.
+        # Free spots per vehicle type, updated in O(1) on every park/unpark through this level.
+        self.availableCounts = {vehicleType: len(spots) for vehicleType, spots in self.freeSpots.items()}
+
+    def _acquire(self, lock):
+        if not lock.acquire(blocking=False):
+            self.contentions += 1
+            lock.acquire()
+
+    @classmethod
+    def fromLayout(cls, floor, spotTypes, layout):
+        # Rebuilds an empty level from a journal snapshot; snapshotLayout() is the inverse.
+        return cls(floor, len(spotTypes), spotTypes)
+
+    def snapshotLayout(self):
+        # What the journal needs beyond the spot types to rebuild this level; a plain Level needs nothing.
+        return None
+
+    def replay(self, records):
+        # Applies journal (event, spotNumber, registrationNumber) records, as CompactLevel.replay does.
+        # Spots are taken and released directly and the free lists are rebuilt once at the end.
+        for event, spotNumber, registrationNumber in records:
+            spot = self.parkingSpots[spotNumber]
+            if event == PARK:
+                spot.parkVehicle(VEHICLE_CLASSES[spot.vehicleType](registrationNumber))
+                self.parkedSpots[registrationNumber] = spotNumber
+            else:
+                spot.unparkVehicle()
+                del self.parkedSpots[registrationNumber]
+        self._buildFreeLists()
+
+    def parkVehicle(self, vehicle, gate=None):
+        # This method adheres to SRP by being responsible for parking vehicles in appropriate spots.
+        # A plain Level hands out the lowest-numbered spot whatever the entry gate.
+        if self.journal:
+            self.journal.checkVehicle(vehicle)
+        freeSpots = self.freeSpots[vehicle.vehicleType]
+        lock = self.locks[vehicle.vehicleType]
+        self._acquire(lock)
+        try:
+            if vehicle.registrationNumber in self.parkedSpots:
+                return False
+            while freeSpots:
+                spot = self.parkingSpots[heapq.heappop(freeSpots)]
+                if spot.isAvailable():
+                    spot.parkVehicle(vehicle)
+                    self.parkedSpots[vehicle.registrationNumber] = spot.spotNumber
+                    self.availableCounts[vehicle.vehicleType] -= 1
+                    if self.journal:
+                        self.journal.record(PARK, self.levelIndex, spot.spotNumber, vehicle)
+                    return True
+            return False
+        finally:
+            lock.release()
 
     def unparkVehicle(self, vehicle):
         # Unparks the vehicle from the spot it was parked in, maintaining SRP.
-        for spot in self.parkingSpots:
-            if not spot.isAvailable() and spot.parked_vehicle == vehicle:
-                spot.unparkVehicle()
-                return True
-        return False
+        spotNumber = self.parkedSpots.get(vehicle.registrationNumber)
+        if spotNumber is None:
+            return False
+        spot = self.parkingSpots[spotNumber]
+        lock = self.locks[spot.vehicleType]
+        self._acquire(lock)
+        try:
+            # Re-check under the lock: another gate may have been faster. Vehicles are matched by registration
+            # number, as in CompactLevel, so any Vehicle object with the right registration can leave.
+            if not spot.parked_vehicle or spot.parked_vehicle.registrationNumber != vehicle.registrationNumber:
+                return False
+            spot.unparkVehicle()
+            del self.parkedSpots[vehicle.registrationNumber]
+            heapq.heappush(self.freeSpots[spot.vehicleType], spotNumber)
+            self.availableCounts[spot.vehicleType] += 1
+            if self.journal:
+                self.journal.record(UNPARK, self.levelIndex, spotNumber, vehicle)
+            return True
+        finally:
+            lock.release()
+
+    def snapshotState(self):
+        # The level in the flat CompactLevel form ParkingLotJournal stores:
+        # (spot types, free flags, occupant tickets, ticket numbers, occupied spots, registrations).
+        spotTypes = bytes(spot.vehicleType.value for spot in self.parkingSpots)
+        free = bytes(spot.vehicleType.value if spot.isAvailable() else 0 for spot in self.parkingSpots)
+        occupants = array("q", [0]) * len(self.parkingSpots)
+        for ticket, spotNumber in enumerate(self.parkedSpots.values(), 1):
+            occupants[spotNumber] = ticket
+        ticketNumbers = array("q", range(1, len(self.parkedSpots) + 1))
+        occupiedSpots = array("I", self.parkedSpots.values())
+        return spotTypes, free, occupants, ticketNumbers, occupiedSpots, list(self.parkedSpots)
 
     def displayAvailableSpots(self):
         # Displays all available or occupied spots per level.
@@ -117,6 +285,450 @@ class Level:
             #     print(f"Level: {self.floor}, Spot: {spot.spotNumber}, Available")
 
 
+class GateAwareLevel(Level):
+    # Level that parks each vehicle in the free spot nearest to the gate it entered through.
+    # The distance from every gate to every spot is computed once, and each (gate, vehicle type) keeps a
+    # min-heap of (distance, spotNumber) over its free spots, so allocation stays O(log n).
+    # Spots taken through another gate are not removed from this gate's heap right away (lazy deletion):
+    # they are skipped when they reach the top. inHeap[gate] marks which spots currently have an entry
+    # in that gate's heap, so a released spot is never pushed twice.
+    # Vehicles without a gate use the level's default lowest-number-first order.
+    def __init__(self, floor: int, numberOfSpots: int, gatePositions, spotPositions=None, spotTypes=None, rowLength=50):
+        if spotPositions is None:
+            # Default layout: rows of `rowLength` spots, one unit apart.
+            spotPositions = [(i % rowLength, i // rowLength) for i in range(numberOfSpots)]
+        self.gatePositions = dict(gatePositions)
+        self.spotPositions = list(spotPositions)
+        self.distances = {None: list(range(numberOfSpots))}
+        for gate, (gateX, gateY) in self.gatePositions.items():
+            # Manhattan distance: how far you actually drive/walk along the aisles.
+            self.distances[gate] = [abs(x - gateX) + abs(y - gateY) for x, y in self.spotPositions]
+        super().__init__(floor, numberOfSpots, spotTypes)
+
+    def _buildFreeLists(self):
+        # One heap per (gate, vehicle type) over the free spots, instead of Level's single free list.
+        self.gateHeaps = {}
+        self.inHeap = {}
+        for gate, distances in self.distances.items():
+            heaps = {vehicleType: [] for vehicleType in VehicleType}
+            inHeap = bytearray(len(self.parkingSpots))
+            for spot in self.parkingSpots:
+                if spot.isAvailable():
+                    heaps[spot.vehicleType].append((distances[spot.spotNumber], spot.spotNumber))
+                    inHeap[spot.spotNumber] = 1
+            for heap in heaps.values():
+                heapq.heapify(heap)
+            self.gateHeaps[gate] = heaps
+            self.inHeap[gate] = inHeap
+        self.freeSpots = self.gateHeaps[None]
+        self.availableCounts = {vehicleType: len(spots) for vehicleType, spots in self.freeSpots.items()}
+
+    @classmethod
+    def fromLayout(cls, floor, spotTypes, layout):
+        gatePositions = {gate: (x, y) for gate, x, y in layout["gates"]}
+        return cls(floor, len(spotTypes), gatePositions, [tuple(position) for position in layout["spots"]], spotTypes)
+
+    def snapshotLayout(self):
+        # Gate names must be JSON-serialisable (strings or numbers); they are stored as [gate, x, y] triples
+        # rather than an object so that numeric names come back as numbers.
+        return {"gates": [[gate, x, y] for gate, (x, y) in self.gatePositions.items()], "spots": self.spotPositions}
+
+    def parkVehicle(self, vehicle, gate=None):
+        if gate not in self.gateHeaps:
+            gate = None
+        if self.journal:
+            self.journal.checkVehicle(vehicle)
+        heap = self.gateHeaps[gate][vehicle.vehicleType]
+        inHeap = self.inHeap[gate]
+        lock = self.locks[vehicle.vehicleType]
+        self._acquire(lock)
+        try:
+            if vehicle.registrationNumber in self.parkedSpots:
+                return False
+            while heap:
+                _, spotNumber = heapq.heappop(heap)
+                inHeap[spotNumber] = 0
+                spot = self.parkingSpots[spotNumber]
+                if spot.isAvailable():  # Otherwise taken through another gate: drop the stale entry.
+                    spot.parkVehicle(vehicle)
+                    self.parkedSpots[vehicle.registrationNumber] = spotNumber
+                    self.availableCounts[vehicle.vehicleType] -= 1
+                    if self.journal:
+                        self.journal.record(PARK, self.levelIndex, spotNumber, vehicle)
+                    return True
+            return False
+        finally:
+            lock.release()
+
+    def unparkVehicle(self, vehicle):
+        spotNumber = self.parkedSpots.get(vehicle.registrationNumber)
+        if spotNumber is None:
+            return False
+        spot = self.parkingSpots[spotNumber]
+        lock = self.locks[spot.vehicleType]
+        self._acquire(lock)
+        try:
+            if not spot.parked_vehicle or spot.parked_vehicle.registrationNumber != vehicle.registrationNumber:
+                return False
+            spot.unparkVehicle()
+            del self.parkedSpots[vehicle.registrationNumber]
+            for gate, heaps in self.gateHeaps.items():
+                if not self.inHeap[gate][spotNumber]:
+                    heapq.heappush(heaps[spot.vehicleType], (self.distances[gate][spotNumber], spotNumber))
+                    self.inHeap[gate][spotNumber] = 1
+            self.availableCounts[spot.vehicleType] += 1
+            if self.journal:
+                self.journal.record(UNPARK, self.levelIndex, spotNumber, vehicle)
+            return True
+        finally:
+            lock.release()
+
+
+class CompactLevel:
+    # Drop-in alternative to Level for very large facilities (millions of spots in one process).
+    # Instead of one ParkingSpot object per spot (hundreds of bytes each) the level keeps three flat arrays:
+    #   spotTypes  array('b')  - VehicleType value of every spot                       (1 byte per spot)
+    #   free       bytearray   - the spot's VehicleType value while free, 0 once taken (1 byte per spot)
+    #   occupants  array('q')  - ticket number of the parked vehicle, 0 when free      (8 bytes per spot)
+    # Ticket numbers come from one itertools.count per level, shared by all vehicle-type stripes, and are
+    # 64-bit so they never wrap.
+    # Finding the lowest free spot of a type is free.find(typeValue, searchFrom), a C-level byte scan;
+    # searchFrom only moves forward while parking and back when a lower spot is released.
+    def __init__(self, floor: int, numberOfSpots: int, spotTypes=None):
+        self.floor = floor
+        if spotTypes:
+            self.spotTypes = array("b", (vehicleType.value for vehicleType in spotTypes))
+        else:
+            self.spotTypes = array("b", [VehicleType.CAR.value]) * numberOfSpots
+        self.free = bytearray(self.spotTypes.tobytes())
+        self.occupants = array("q", [0]) * numberOfSpots
+        self.searchFrom = {vehicleType: 0 for vehicleType in VehicleType}
+        self.availableCounts = {vehicleType: self.free.count(vehicleType.value) for vehicleType in VehicleType}
+        self.tickets = {}      # ticket number -> registration number of the parked vehicle (occupied spots only)
+        self.ticketNumbers = itertools.count(1)  # next() is atomic, so parks under different stripes never share a ticket
+        self.parkedSpots = {}  # registrationNumber -> spot number, as in Level
+        self.locks = {vehicleType: threading.Lock() for vehicleType in VehicleType}
+        self.contentions = 0
+        self.levelIndex = None
+        self.journal = None
+
+    def _acquire(self, lock):
+        if not lock.acquire(blocking=False):
+            self.contentions += 1
+            lock.acquire()
+
+    def occupySpot(self, spotNumber, registrationNumber):
+        # Marks a spot as taken without any search; used by parkVehicle and by journal replay.
+        vehicleType = VehicleType(self.spotTypes[spotNumber])
+        self.free[spotNumber] = 0
+        ticket = next(self.ticketNumbers)
+        self.occupants[spotNumber] = ticket
+        self.tickets[ticket] = registrationNumber
+        self.parkedSpots[registrationNumber] = spotNumber
+        self.availableCounts[vehicleType] -= 1
+
+    def releaseSpot(self, spotNumber):
+        vehicleType = VehicleType(self.spotTypes[spotNumber])
+        registrationNumber = self.tickets.pop(self.occupants[spotNumber])
+        del self.parkedSpots[registrationNumber]
+        self.occupants[spotNumber] = 0
+        self.free[spotNumber] = vehicleType.value
+        self.searchFrom[vehicleType] = min(self.searchFrom[vehicleType], spotNumber)
+        self.availableCounts[vehicleType] += 1
+
+    def replay(self, records):
+        # Applies journal (event, spotNumber, registrationNumber) records in bulk. Counters and search
+        # positions are recomputed once at the end instead of per record, keeping the loop free of enums.
+        free, spotTypes, occupants = self.free, self.spotTypes, self.occupants
+        tickets, parkedSpots = self.tickets, self.parkedSpots
+        ticket = next(self.ticketNumbers)
+        for event, spotNumber, registrationNumber in records:
+            if event == PARK:
+                free[spotNumber] = 0
+                occupants[spotNumber] = ticket
+                tickets[ticket] = registrationNumber
+                parkedSpots[registrationNumber] = spotNumber
+                ticket += 1
+            else:
+                del parkedSpots[tickets.pop(occupants[spotNumber])]
+                occupants[spotNumber] = 0
+                free[spotNumber] = spotTypes[spotNumber]
+        self.ticketNumbers = itertools.count(ticket)
+        self.searchFrom = {vehicleType: 0 for vehicleType in VehicleType}
+        self.availableCounts = {vehicleType: free.count(vehicleType.value) for vehicleType in VehicleType}
+
+    def parkVehicle(self, vehicle, gate=None):
+        if self.journal:
+            self.journal.checkVehicle(vehicle)
+        vehicleType = vehicle.vehicleType
+        lock = self.locks[vehicleType]
+        self._acquire(lock)
+        try:
+            if vehicle.registrationNumber in self.parkedSpots:
+                return False
+            spotNumber = self.free.find(vehicleType.value, self.searchFrom[vehicleType])
+            if spotNumber < 0:
+                self.searchFrom[vehicleType] = len(self.free)
+                return False
+            self.searchFrom[vehicleType] = spotNumber + 1
+            self.occupySpot(spotNumber, vehicle.registrationNumber)
+            if self.journal:
+                self.journal.record(PARK, self.levelIndex, spotNumber, vehicle)
+            return True
+        finally:
+            lock.release()
+
+    def unparkVehicle(self, vehicle):
+        # Vehicles are matched by registration number, so a car parked before a restart can still leave.
+        spotNumber = self.parkedSpots.get(vehicle.registrationNumber)
+        if spotNumber is None:
+            return False
+        lock = self.locks[VehicleType(self.spotTypes[spotNumber])]
+        self._acquire(lock)
+        try:
+            if self.tickets.get(self.occupants[spotNumber]) != vehicle.registrationNumber:
+                return False
+            self.releaseSpot(spotNumber)
+            if self.journal:
+                self.journal.record(UNPARK, self.levelIndex, spotNumber, vehicle)
+            return True
+        finally:
+            lock.release()
+
+    def snapshotLayout(self):
+        return None
+
+    def snapshotState(self):
+        registrations = list(self.tickets.values())
+        ticketNumbers = array("q", self.tickets)
+        occupiedSpots = array("I", map(self.parkedSpots.__getitem__, registrations))
+        return self.spotTypes.tobytes(), bytes(self.free), self.occupants.tobytes(), ticketNumbers, occupiedSpots, registrations
+
+    @staticmethod
+    def fromSnapshot(floor, spotTypes, free, occupants, ticketNumbers, occupiedSpots, registrations):
+        # Rebuilds a level from flat snapshot data with bulk copies; no per-spot objects or loops.
+        level = CompactLevel.__new__(CompactLevel)
+        level.floor = floor
+        level.spotTypes = array("b")
+        level.spotTypes.frombytes(spotTypes)
+        level.free = bytearray(free)
+        level.occupants = array("q")
+        level.occupants.frombytes(occupants)
+        level.searchFrom = {vehicleType: 0 for vehicleType in VehicleType}
+        level.availableCounts = {vehicleType: level.free.count(vehicleType.value) for vehicleType in VehicleType}
+        level.tickets = dict(zip(ticketNumbers, registrations))
+        level.ticketNumbers = itertools.count(max(ticketNumbers, default=0) + 1)
+        level.parkedSpots = dict(zip(registrations, occupiedSpots))
+        level.locks = {vehicleType: threading.Lock() for vehicleType in VehicleType}
+        level.contentions = 0
+        level.levelIndex = None
+        level.journal = None
+        return level
+
+    def displayAvailableSpots(self):
+        # Only occupied spots are printed, so walk the parked vehicles rather than every spot.
+        for registrationNumber, spotNumber in sorted(self.parkedSpots.items(), key=lambda item: item[1]):
+            vehicleType = VehicleType(self.spotTypes[spotNumber])
+            print(f"Level: {self.floor}, Spot: {spotNumber}, Occupied Vehicle of Type {vehicleType} of Registration Number: {registrationNumber}")
+
+
+PARK = 1
+UNPARK = 2
+
+
+class ParkingLotJournal:
+    # Durability for ParkingLot: an append-only binary log of park/unpark events plus periodic snapshots.
+    #   journal.log   16-byte header (magic, generation) followed by fixed 24-byte records
+    #                 (event, vehicle type, level index, spot number, registration number padded to 16 bytes)
+    #   snapshot.bin  every level as its kind (CompactLevel, Level or GateAwareLevel) and flat arrays: spot types,
+    #                 free flags, occupant tickets, ticket numbers, occupied spots, a newline-separated blob of
+    #                 registration numbers and, for a GateAwareLevel, its gate and spot positions as JSON
+    # A snapshot is written with all level locks held, then the log restarts under the next generation.
+    # On recovery the snapshot is mapped with mmap; CompactLevels are copied back in bulk, other levels are
+    # rebuilt from their layout and re-parked spot by spot. Only log records of the same generation are
+    # replayed; a log left over from before the snapshot is ignored. The recovered lot becomes the singleton.
+    # The log is unbuffered, so every record reaches the OS as it is written and a killed process loses nothing.
+    # fsyncEvery also forces records to disk: 1 after every record, N once per N records (group commit), and 0
+    # leaves it to the OS and flush(), so a power failure can lose the records since the last fsync.
+    LOG_MAGIC = b"PLJLOG01"
+    SNAPSHOT_MAGIC = b"PLJSNP03"
+    LOG_HEADER = struct.Struct("<8sQ")
+    RECORD = struct.Struct("<BBHI16s")
+    SNAPSHOT_HEADER = struct.Struct("<8sQI")
+    LEVEL_HEADER = struct.Struct("<iIIIBI")
+    LEVEL_KINDS = (CompactLevel, Level, GateAwareLevel)  # Index stored in LEVEL_HEADER
+
+    def __init__(self, directory, snapshotEvery=100000, fsyncEvery=0):
+        self.directory = directory
+        self.logPath = os.path.join(directory, "journal.log")
+        self.snapshotPath = os.path.join(directory, "snapshot.bin")
+        self.snapshotEvery = snapshotEvery
+        self.fsyncEvery = fsyncEvery
+        self.recordsSinceSnapshot = 0
+        self.recordsSinceSync = 0
+        self.lock = threading.Lock()          # Serialises appends to the log file
+        self.snapshotLock = threading.Lock()  # Only one snapshot at a time
+        os.makedirs(directory, exist_ok=True)
+        self.generation = self._readGeneration(self.snapshotPath, self.SNAPSHOT_HEADER)
+        if self._readGeneration(self.logPath, self.LOG_HEADER) != self.generation:
+            self._startLog()
+        self.logFile = self._openLog()
+
+    def hasSnapshot(self):
+        return os.path.exists(self.snapshotPath)
+
+    def _readGeneration(self, path, header):
+        try:
+            with open(path, "rb") as f:
+                _, generation, *_ = header.unpack(f.read(header.size))
+                return generation
+        except (OSError, struct.error):
+            return 0
+
+    def _openLog(self):
+        return open(self.logPath, "ab", buffering=0)
+
+    def _startLog(self):
+        with open(self.logPath, "wb") as f:
+            f.write(self.LOG_HEADER.pack(self.LOG_MAGIC, self.generation))
+
+    def checkVehicle(self, vehicle):
+        # Levels call this before taking a spot: a record that cannot be written must not leave a spot half-parked.
+        registrationNumber = vehicle.registrationNumber
+        if len(registrationNumber.encode()) > 16:
+            raise ValueError("Registration numbers longer than 16 bytes are not supported by the journal")
+        if "\n" in registrationNumber or "\0" in registrationNumber:
+            # Snapshots separate registrations with newlines and log records pad them with NUL bytes.
+            raise ValueError("Registration numbers containing newline or NUL characters are not supported by the journal")
+
+    def checkLevel(self, level):
+        if type(level) not in self.LEVEL_KINDS:
+            raise ValueError(f"{type(level).__name__} cannot be journaled; use one of "
+                             f"{', '.join(kind.__name__ for kind in self.LEVEL_KINDS)}")
+
+    def record(self, event, levelIndex, spotNumber, vehicle):
+        self.checkVehicle(vehicle)
+        data = self.RECORD.pack(event, vehicle.vehicleType.value, levelIndex, spotNumber, vehicle.registrationNumber.encode())
+        with self.lock:
+            self.logFile.write(data)
+            self.recordsSinceSnapshot += 1
+            self.recordsSinceSync += 1
+            if self.fsyncEvery and self.recordsSinceSync >= self.fsyncEvery:
+                os.fsync(self.logFile.fileno())
+                self.recordsSinceSync = 0
+
+    def flush(self):
+        with self.lock:
+            self.logFile.flush()
+            os.fsync(self.logFile.fileno())
+            self.recordsSinceSync = 0
+
+    def maybeSnapshot(self, parkingLot):
+        if self.recordsSinceSnapshot >= self.snapshotEvery and self.snapshotLock.acquire(blocking=False):
+            try:
+                self.snapshot(parkingLot)
+            finally:
+                self.snapshotLock.release()
+
+    def snapshot(self, parkingLot):
+        # Hold every stripe of every level (always in the same order) so the snapshot is a consistent cut.
+        for level in parkingLot.levels:
+            self.checkLevel(level)
+        locks = [level.locks[vehicleType] for level in parkingLot.levels for vehicleType in VehicleType]
+        for lock in locks:
+            lock.acquire()
+        try:
+            generation = self.generation + 1
+            temporaryPath = self.snapshotPath + ".tmp"
+            with open(temporaryPath, "wb") as f:
+                f.write(self.SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, generation, len(parkingLot.levels)))
+                for level in parkingLot.levels:
+                    spotTypes, free, occupants, ticketNumbers, occupiedSpots, registrations = level.snapshotState()
+                    blob = "\n".join(registrations).encode()
+                    layout = level.snapshotLayout()
+                    layout = json.dumps(layout).encode() if layout is not None else b""
+                    f.write(self.LEVEL_HEADER.pack(level.floor, len(spotTypes), len(occupiedSpots), len(blob),
+                                                   self.LEVEL_KINDS.index(type(level)), len(layout)))
+                    for part in (spotTypes, free, occupants, ticketNumbers.tobytes(), occupiedSpots.tobytes(), blob, layout):
+                        f.write(part)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporaryPath, self.snapshotPath)  # Atomic: readers see the old or the new snapshot.
+            with self.lock:
+                self.logFile.close()
+                self.generation = generation
+                self._startLog()
+                self.logFile = self._openLog()
+                self.recordsSinceSnapshot = 0
+                self.recordsSinceSync = 0
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def recover(self):
+        # Rebuilds the ParkingLot with the same kind of level on every floor: snapshot through mmap, then
+        # replay of the log tail.
+        parkingLot = ParkingLot()
+        if self.hasSnapshot():
+            with open(self.snapshotPath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, _, numberOfLevels = self.SNAPSHOT_HEADER.unpack_from(data, 0)
+                if magic != self.SNAPSHOT_MAGIC:
+                    raise ValueError(f"{self.snapshotPath} is not a {self.SNAPSHOT_MAGIC.decode()} snapshot")
+                offset = self.SNAPSHOT_HEADER.size
+                for _ in range(numberOfLevels):
+                    floor, numberOfSpots, numberOccupied, blobLength, kind, layoutLength = self.LEVEL_HEADER.unpack_from(data, offset)
+                    offset += self.LEVEL_HEADER.size
+                    parts = []
+                    for length in (numberOfSpots, numberOfSpots, 8 * numberOfSpots, 8 * numberOccupied,
+                                   4 * numberOccupied, blobLength, layoutLength):
+                        parts.append(data[offset:offset + length])
+                        offset += length
+                    spotTypes, free, occupants, ticketBytes, spotBytes, blob, layout = parts
+                    ticketNumbers, occupiedSpots = array("q"), array("I")
+                    ticketNumbers.frombytes(ticketBytes)
+                    occupiedSpots.frombytes(spotBytes)
+                    registrations = blob.decode().split("\n") if numberOccupied else []
+                    levelKind = self.LEVEL_KINDS[kind]
+                    if levelKind is CompactLevel:
+                        level = CompactLevel.fromSnapshot(floor, spotTypes, free, occupants, ticketNumbers,
+                                                          occupiedSpots, registrations)
+                    else:
+                        level = levelKind.fromLayout(floor, [VehicleType(value) for value in spotTypes],
+                                                     json.loads(layout) if layout else None)
+                        # Registrations are in ticket order, so parkedSpots keeps the original parking order.
+                        level.replay(zip(itertools.repeat(PARK), occupiedSpots, registrations))
+                    parkingLot.addLevel(level)
+
+        with self.lock:
+            self.logFile.flush()
+        if os.path.getsize(self.logPath) > self.LOG_HEADER.size:
+            with open(self.logPath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = self.LOG_HEADER.size + (len(data) - self.LOG_HEADER.size) // self.RECORD.size * self.RECORD.size
+                records = [[] for _ in parkingLot.levels]
+                for event, _, levelIndex, spotNumber, registration in self.RECORD.iter_unpack(data[self.LOG_HEADER.size:end]):
+                    records[levelIndex].append((event, spotNumber, registration.rstrip(b"\0").decode()))
+                logSize = len(data)
+            for level, levelRecords in zip(parkingLot.levels, records):
+                level.replay(levelRecords)
+            if end < logSize:
+                # Cut off a torn final record, or the next record would be appended out of frame.
+                with self.lock:
+                    self.logFile.close()
+                    os.truncate(self.logPath, end)
+                    self.logFile = self._openLog()
+
+        for level in parkingLot.levels:
+            parkingLot.vehicleLevels.update(dict.fromkeys(level.parkedSpots, level))
+        parkingLot.enableJournal(self)
+        with ParkingLot._lock:
+            ParkingLot._instance = parkingLot  # After a restart get_instance() must hand out the recovered lot.
+        return parkingLot
+
+    def close(self):
+        with self.lock:
+            self.logFile.close()
+
+
 class ParkingSpot:
     # ParkingSpot adheres to SRP, as it handles only one responsibility - managing the status of a parking spot.
     def __init__(self, spotNumber: int):
@@ -140,11 +752,280 @@ class ParkingSpot:
         self.parked_vehicle = None
 
 
+def checkTornJournalRecovery(directory):
+    # A crash mid-write leaves part of a record at the end of the log; recovery must drop it so that
+    # records appended afterwards stay aligned and a second restart still sees them.
+    journal = ParkingLotJournal(directory)
+    parkingLot = ParkingLot()
+    parkingLot.addLevel(CompactLevel(0, 10))
+    parkingLot.enableJournal(journal)
+    parkingLot.parkVehicle(Car("A1"))
+    journal.flush()
+    journal.close()
+    with open(journal.logPath, "ab") as f:
+        f.write(ParkingLotJournal.RECORD.pack(PARK, VehicleType.CAR.value, 0, 5, b"TORN")[:10])
+
+    journal = ParkingLotJournal(directory)
+    recovered = journal.recover()
+    assert recovered.findVehicle("A1") == (0, 0)
+    assert recovered.parkVehicle(Car("B2"))
+    journal.flush()
+    journal.close()
+
+    journal = ParkingLotJournal(directory)
+    recovered = journal.recover()
+    assert recovered.findVehicle("A1") == (0, 0) and recovered.findVehicle("B2") == (0, 1)
+    assert recovered.getAvailableCount(VehicleType.CAR) == 8
+    journal.close()
+    print("Torn journal tail: dropped on recovery, later records survive a second restart")
+
+def checkRestartWithoutShutdown(directory, numberOfCars=100):
+    # A process that dies without flush() or close() must still leave every park it acknowledged in the log.
+    script = (f"import os, sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+              f"from parking_lot import *; "
+              f"parkingLot = ParkingLot(); parkingLot.addLevel(CompactLevel(0, {numberOfCars})); "
+              f"parkingLot.enableJournal(ParkingLotJournal({directory!r})); "
+              f"[parkingLot.parkVehicle(Car(f'K{{i}}')) for i in range({numberOfCars})]; "
+              f"os._exit(0)")
+    subprocess.run([sys.executable, "-c", script], check=True)
+    journal = ParkingLotJournal(directory)
+    recovered = journal.recover()
+    assert all(recovered.findVehicle(f"K{i}") == (0, i) for i in range(numberOfCars))
+    journal.close()
+    print(f"Restart without shutdown: all {numberOfCars} parks recovered after os._exit")
+
+def checkUnjournalableRegistration(directory):
+    # A registration the journal cannot store is rejected before any level hands out a spot.
+    journal = ParkingLotJournal(directory)
+    parkingLot = ParkingLot()
+    for level in (Level(0, 2), GateAwareLevel(1, 2, {"north": (0, 0)}), CompactLevel(2, 2)):
+        parkingLot.addLevel(level)
+    parkingLot.enableJournal(journal)
+    availability = parkingLot.getAvailability()
+    for registrationNumber in ("X" * 17, "A\nB", "A\0"):
+        try:
+            parkingLot.parkVehicle(Car(registrationNumber))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"registration {registrationNumber!r} was journaled")
+    assert parkingLot.getAvailability() == availability
+    assert all(not level.parkedSpots for level in parkingLot.levels) and not parkingLot.vehicleLevels
+    journal.close()
+    print("Over-long, newline and NUL registrations: rejected before any spot was taken")
+
+def checkMixedLevelRecovery(directory):
+    # Every kind of level comes back as itself: a GateAwareLevel keeps its gates and spot positions, so a car
+    # entering through a gate after the restart gets the same spot it would have got before.
+    def build():
+        parkingLot = ParkingLot()
+        parkingLot.addLevel(Level(0, 6, [VehicleType.CAR, VehicleType.MOTORCYCLE] * 3))
+        parkingLot.addLevel(GateAwareLevel(1, 40, {"north": (0, 0), 7: (9, 3)}, rowLength=10))
+        parkingLot.addLevel(CompactLevel(2, 4))
+        return parkingLot
+
+    journal = ParkingLotJournal(directory)
+    parkingLot = build()
+    parkingLot.enableJournal(journal)
+    for i in range(8):
+        parkingLot.parkVehicle(Car(f"S{i}"), gate=7)     # Before the snapshot
+    parkingLot.parkVehicle(Motorcycle("M0"))
+    journal.snapshot(parkingLot)
+    for i in range(4):
+        parkingLot.parkVehicle(Car(f"L{i}"), gate="north")  # Only in the log
+    parkingLot.unparkVehicle(Car("S1"))
+    parkingLot.unparkVehicle(Car("L0"))
+    journal.close()
+
+    journal = ParkingLotJournal(directory)
+    recovered = journal.recover()
+    assert ParkingLot.get_instance() is recovered
+    assert [type(level) for level in recovered.levels] == [type(level) for level in parkingLot.levels]
+    assert recovered.getAvailability() == parkingLot.getAvailability()
+    for registrationNumber in parkingLot.vehicleLevels:
+        assert recovered.findVehicle(registrationNumber) == parkingLot.findVehicle(registrationNumber)
+    gateLevel = recovered.levels[1]
+    assert gateLevel.gatePositions == parkingLot.levels[1].gatePositions
+    assert gateLevel.spotPositions == parkingLot.levels[1].spotPositions
+    parkingLot.levels[1].journal = None  # Its journal is closed; only the allocation is compared.
+    for gate in ("north", 7, None):
+        assert parkingLot.levels[1].parkVehicle(Car(f"G{gate}"), gate) and gateLevel.parkVehicle(Car(f"G{gate}"), gate)
+        assert gateLevel.parkedSpots[f"G{gate}"] == parkingLot.levels[1].parkedSpots[f"G{gate}"]
+    try:
+        recovered.addLevel(type("CustomLevel", (Level,), {})(3, 1))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a level kind the journal cannot restore was journaled")
+    journal.close()
+    print("Mixed level recovery: Level, GateAwareLevel and CompactLevel restored as themselves, gates included")
+
+def checkDuplicateRegistration():
+    # A registration that is already parked is turned away on every kind of level, and a different Vehicle
+    # object with the same registration can take it out again.
+    for level in (Level(0, 4), GateAwareLevel(0, 4, {"north": (0, 0)}), CompactLevel(0, 4)):
+        parkingLot = ParkingLot()
+        parkingLot.addLevel(level)
+        availability = parkingLot.getAvailability()
+        assert parkingLot.parkVehicle(Car("A")) and not parkingLot.parkVehicle(Car("A"))
+        assert not level.parkVehicle(Car("A"))
+        assert parkingLot.getAvailableCount(VehicleType.CAR) == 3
+        assert parkingLot.unparkVehicle(Car("A")) and not parkingLot.unparkVehicle(Car("A"))
+        assert parkingLot.getAvailability() == availability and not level.parkedSpots
+    print("Duplicate registration: second park rejected, unpark matches by registration on every level kind")
+
+def checkCompactTickets(numberOfSpots=20000):
+    # Cars and motorcycles park under different stripe locks; every vehicle must still get its own ticket.
+    level = CompactLevel(0, numberOfSpots, [VehicleType.CAR, VehicleType.MOTORCYCLE] * (numberOfSpots // 2))
+
+    def park(vehicleClass):
+        for i in range(numberOfSpots // 2):
+            level.parkVehicle(vehicleClass(f"{vehicleClass.__name__}{i}"))
+
+    workers = [threading.Thread(target=park, args=(vehicleClass,)) for vehicleClass in (Car, Motorcycle)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(level.tickets) == len(level.parkedSpots) == numberOfSpots
+    assert sorted(level.occupants) == sorted(level.tickets)
+    print(f"CompactLevel tickets: {numberOfSpots:,} concurrent parks across two stripes, all tickets distinct")
+
+def benchmarkGates(numGates=8, operationsPerGate=20000, numLevels=4, spotsPerLevel=2000):
+    # Every gate thread parks a stream of vehicles and lets the oldest leave once it holds `keepParked`,
+    # then we check that no spot was handed out twice and report throughput and lock contention.
+    parkingLot = ParkingLot()
+    spotTypes = [VehicleType.CAR] * (spotsPerLevel // 2) + [VehicleType.MOTORCYCLE] * (spotsPerLevel // 4) + \
+                [VehicleType.TRUCK] * (spotsPerLevel - spotsPerLevel // 2 - spotsPerLevel // 4)
+    for floor in range(numLevels):
+        parkingLot.addLevel(Level(floor, spotsPerLevel, spotTypes))
+    keepParked = numLevels * spotsPerLevel // (2 * numGates)
+    parks = [0] * numGates
+
+    def gate(gateId):
+        vehicleClasses = (Car, Motorcycle, Truck)
+        parked = deque()
+        for i in range(operationsPerGate):
+            vehicle = vehicleClasses[i % 3](f"G{gateId}-{i}")
+            if parkingLot.parkVehicle(vehicle):
+                parks[gateId] += 1
+                parked.append(vehicle)
+            if len(parked) > keepParked:
+                parkingLot.unparkVehicle(parked.popleft())
+
+    threads = [threading.Thread(target=gate, args=(gateId,)) for gateId in range(numGates)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    occupied = [spot.parked_vehicle.registrationNumber for level in parkingLot.levels
+                for spot in level.parkingSpots if not spot.isAvailable()]
+    assert len(occupied) == len(set(occupied)) == len(parkingLot.vehicleLevels), "spot double-assigned"
+    contentions = sum(level.contentions for level in parkingLot.levels)
+    print(f"{numGates} gates: {sum(parks)} parks in {elapsed:.2f}s = {sum(parks) / elapsed:,.0f} parks/s, "
+          f"{contentions} contended lock acquisitions")
+    return sum(parks) / elapsed, contentions
+
+def benchmarkGateAllocation(numLevels=4, spotsPerLevel=5000, operations=200000, seed=0):
+    # Multi-gate facility (a gate at each corner of every level) under random arrivals and departures:
+    # gate-aware allocation versus the plain lowest-number-first Level, comparing distance and throughput.
+    rowLength = 100
+    rows = spotsPerLevel // rowLength
+    gatePositions = {"north-west": (0, 0), "north-east": (rowLength - 1, 0),
+                     "south-west": (0, rows - 1), "south-east": (rowLength - 1, rows - 1)}
+    gates = list(gatePositions)
+    for name in ("first-free", "gate-aware"):
+        rng = random.Random(seed)
+        parkingLot = ParkingLot()
+        for floor in range(numLevels):
+            if name == "gate-aware":
+                parkingLot.addLevel(GateAwareLevel(floor, spotsPerLevel, gatePositions, rowLength=rowLength))
+            else:
+                parkingLot.addLevel(Level(floor, spotsPerLevel))
+        distanceToSpot = GateAwareLevel(0, spotsPerLevel, gatePositions, rowLength=rowLength).distances
+        parked, totalDistance, parks = [], 0, 0
+        start = time.perf_counter()
+        for i in range(operations):
+            if parked and (rng.random() < 0.45 or len(parked) >= numLevels * spotsPerLevel * 0.9):
+                index = rng.randrange(len(parked))
+                parked[index], parked[-1] = parked[-1], parked[index]  # O(1) removal; order does not matter.
+                parkingLot.unparkVehicle(parked.pop())
+                continue
+            gate = rng.choice(gates)
+            vehicle = Car(f"C{i}")
+            if parkingLot.parkVehicle(vehicle, gate):
+                parks += 1
+                parked.append(vehicle)
+                totalDistance += distanceToSpot[gate][parkingLot.findVehicle(vehicle.registrationNumber)[1]]
+        elapsed = time.perf_counter() - start
+        print(f"{name:10}: {operations / elapsed:,.0f} operations/s, mean distance from gate {totalDistance / parks:.1f}")
+
+def benchmarkRestart(directory, numberOfSpots=1_000_000, occupancy=0.6, tailEvents=100_000):
+    # Fills a million-spot lot, snapshots it, appends a log tail and measures how long recovery takes.
+    journal = ParkingLotJournal(directory, snapshotEvery=10 ** 9)  # Snapshot manually below.
+    parkingLot = ParkingLot()
+    parkingLot.addLevel(CompactLevel(0, numberOfSpots))
+    parkingLot.enableJournal(journal)
+    for i in range(int(numberOfSpots * occupancy)):
+        parkingLot.parkVehicle(Car(f"S{i}"))
+    journal.snapshot(parkingLot)
+    for i in range(tailEvents // 2):
+        parkingLot.unparkVehicle(Car(f"S{i}"))
+        parkingLot.parkVehicle(Car(f"T{i}"))
+    journal.flush()
+    journal.close()
+    availability = parkingLot.getAvailability()
+
+    start = time.perf_counter()
+    recovered = ParkingLotJournal(directory).recover()
+    elapsed = time.perf_counter() - start
+    assert recovered.getAvailability() == availability
+    assert recovered.findVehicle(f"T{tailEvents // 2 - 1}") == parkingLot.findVehicle(f"T{tailEvents // 2 - 1}")
+    print(f"Recovered {numberOfSpots:,} spots ({len(recovered.vehicleLevels):,} parked) "
+          f"plus {tailEvents:,} log records in {elapsed:.2f}s")
+    recovered.journal.close()
+    return elapsed
+
 if __name__ == "__main__":
+    if "--self-test" in sys.argv:
+        # python parking_lot.py --self-test
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            checkTornJournalRecovery(directory)
+        with tempfile.TemporaryDirectory() as directory:
+            checkRestartWithoutShutdown(directory)
+        with tempfile.TemporaryDirectory() as directory:
+            checkUnjournalableRegistration(directory)
+        with tempfile.TemporaryDirectory() as directory:
+            checkMixedLevelRecovery(directory)
+        checkDuplicateRegistration()
+        checkCompactTickets()
+        sys.exit()
+    if "--restart-benchmark" in sys.argv:
+        # python parking_lot.py --restart-benchmark
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            benchmarkRestart(directory)
+        sys.exit()
+    if "--allocator-benchmark" in sys.argv:
+        # python parking_lot.py --allocator-benchmark
+        benchmarkGateAllocation()
+        sys.exit()
+
+    if "--gate-benchmark" in sys.argv:
+        # python parking_lot.py --gate-benchmark
+        for numGates in (1, 2, 4, 8):
+            benchmarkGates(numGates, operationsPerGate=160000 // numGates)
+        sys.exit()
+
     # Main program demonstrating the use of Singleton ParkingLot and vehicle parking system.
     parking_lot = ParkingLot.get_instance()
     parking_lot.addLevel(Level(1, 100))
-    parking_lot.addLevel(Level(2, 80))
+    parking_lot.addLevel(Level(2, 80, [VehicleType.MOTORCYCLE] * 20 + [VehicleType.TRUCK] * 10 + [VehicleType.CAR] * 50))
+    parking_lot.addLevel(CompactLevel(3, 1_000_000))  # A million car spots in about 10 MB.
 
     car = Car("ABC123")
     truck = Truck("XYZ789")
@@ -157,8 +1038,10 @@ if __name__ == "__main__":
 
     # Display availability
     parking_lot.displayAvailableSpots()
+    print(f"Available spots: {parking_lot.getAvailability()}")
 
-    # Unpark vehicle
+    # Find and unpark vehicle
+    print(f"Motorcycle M1234 is at (level, spot): {parking_lot.findVehicle('M1234')}")
     parking_lot.unparkVehicle(motorcycle)
 
     # Display updated availability
@@ -171,10 +1054,16 @@ Explaination:
 Classes, Interfaces and Enumerations:
 The ParkingLot class follows the Singleton pattern to ensure only one instance of the parking lot exists. It maintains a list of levels and provides methods to park and unpark vehicles.
 The Level class represents a level in the parking lot and contains a list of parking spots. It handles parking and unparking of vehicles within the level.
+ParkingLot maps registration numbers to levels and each Level maps them to spot numbers, so unparking and "where is my car" lookups are O(1).
+Each Level keeps a min-heap of free spot numbers per VehicleType, so parking takes O(log n) and ParkingLot falls through to the next level when one is full for that type.
+The GateAwareLevel class precomputes the distance from every entry gate to every spot and keeps a per-gate, per-type heap of free spots, so each vehicle gets the nearest free spot to its gate in O(log n); spots taken through other gates are dropped lazily.
+The CompactLevel class is a drop-in alternative to Level for very large facilities. It stores spot types, free flags and occupant ticket numbers in flat arrays (about 10 bytes per spot) and finds free spots with a byte scan instead of allocating a ParkingSpot object per spot.
+Levels keep free-spot counters per VehicleType that park/unpark update in O(1); ParkingLot.getAvailability and getAvailableCount serve real-time availability from these counters without touching any spot.
+The ParkingLotJournal makes the parking state durable: every park/unpark is appended to a binary log, snapshots periodically store each level's kind, gate layout and flat byte arrays, and recovery maps the snapshot with mmap, rebuilds every level as the kind it was (CompactLevels in bulk copies), replays only the log tail and installs the result as the ParkingLot singleton.
 The ParkingSpot class represents an individual parking spot and tracks the availability and the parked vehicle.
 The Vehicle class is an abstract base class for different types of vehicles. It is extended by Car, Motorcycle, and Truck classes.
 The VehicleType enum defines the different types of vehicles supported by the parking lot.
-Multi-threading is achieved through the use of synchronized keyword on critical sections to ensure thread safety.
+Multi-threading is achieved through lock striping: every Level has one lock per VehicleType guarding its free-spot heap and spots, so concurrent gates never double-assign a spot while unrelated levels and vehicle types proceed in parallel.
 The Main class demonstrates the usage of the parking lot system.
 
 """
\ No newline at end of file
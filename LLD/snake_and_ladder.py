@@ -11,8 +11,21 @@ The game should continue until one of the players reaches the final cell on the
 The game should handle multiple game sessions concurrently, allowing different groups of players to play independently.
 """
 
+import contextlib
+import io
+import itertools
+import queue
 import random
+import sys
 import threading
+import time
+import traceback
+from array import array
+
+try:
+    import numpy as np  # Only needed for the batch Monte Carlo simulator and the Markov chain solver.
+except ImportError:
+    np = None
 
 class GamePiece:
     # SOLID: Single Responsibility Principle - Represents a game piece with a specific color
@@ -21,6 +34,8 @@ class GamePiece:
 
 class Player:
     # SOLID: Single Responsibility Principle - Represents a player with a name, game piece, and position
+    __slots__ = ("name", "piece", "currentPosition")
+
     def __init__(self, name, piece: GamePiece):
         self.name = name
         self.piece = piece
@@ -50,33 +65,99 @@ class Ladder:
 
 class Board:
     # SOLID: Single Responsibility Principle - Represents the board with snakes and ladders
+    # Design Pattern: Flyweight - Cells hold nothing but their number, so every Board shares one tuple of them.
     BOARD_SIZE = 100
+    _sharedCells = {}
 
-    def __init__(self, snakes: list[Snake], ladders: list[Ladder]):
-        self.cells = [Cell(i) for i in range(1, self.BOARD_SIZE + 1)]
-        self.snakes = snakes
-        self.ladders = ladders
+    def __init__(self, snakes: list[Snake], ladders: list[Ladder], verbose=False):
+        self.cells = self.sharedCells(self.BOARD_SIZE)
+        self.snakes = tuple(snakes)
+        self.ladders = tuple(ladders)
+        self.verbose = verbose  # Printing every bite and climb would dominate simulations of millions of moves.
+        self.jumps = memoryview(self.buildJumpTable()).toreadonly()
 
-    def getNewPositionAfterSnakesAndLadders(self, position):
-        for snake in self.snakes:
-            if snake.head.number == position:
-                print(f"Snake Bites {snake.head.number} to {snake.tail.number}")
-                return snake.tail.number
+    @classmethod
+    def sharedCells(cls, size):
+        cells = cls._sharedCells.get(size)
+        if cells is None:
+            cells = cls._sharedCells.setdefault(size, tuple(Cell(i) for i in range(1, size + 1)))
+        return cells
 
+    def buildJumpTable(self):
+        # jumps[cell] is where a piece landing on cell finally rests, following chained snakes and ladders,
+        # so a move is a single index operation instead of a scan over every snake and ladder.
+        direct = list(range(self.BOARD_SIZE + 1))
         for ladder in self.ladders:
-            if ladder.base.number == position:
-                print(f"Ladder Moves {ladder.base.number} to {ladder.top.number}")
-                return ladder.top.number
+            direct[ladder.base.number] = ladder.top.number
+        for snake in self.snakes:  # A snake head wins over a ladder base on the same cell, as before.
+            direct[snake.head.number] = snake.tail.number
+
+        jumps = array("i", direct)
+        for cell in range(self.BOARD_SIZE + 1):
+            visited = {cell}
+            position = direct[cell]
+            while direct[position] != position:
+                if position in visited:
+                    raise ValueError(f"Snakes and ladders starting at cell {cell} form a loop")
+                visited.add(position)
+                position = direct[position]
+            jumps[cell] = position
+        return jumps
+
+    def getNewPositionAfterSnakesAndLadders(self, position):
+        newPosition = self.jumps[position]
+        if self.verbose and newPosition != position:
+            if newPosition < position:
+                print(f"Snake Bites {position} to {newPosition}")
+            else:
+                print(f"Ladder Moves {position} to {newPosition}")
+        return newPosition
 
-        return position
+class BoardTemplateRegistry:
+    # Design Pattern: Flyweight + Singleton - Interns one immutable, precompiled Board per layout.
+    # Boards are read-only once built (tuple cells, snakes and ladders, read-only jump table), so every Game
+    # on the same layout can share one instance and a session only owns its players and their positions.
+    # Layouts are given as (start, end) cell pairs: (head, tail) for snakes and (base, top) for ladders.
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.boards = {}
+        self.boardsLock = threading.Lock()
+
+    @staticmethod
+    def get_instance():
+        if not BoardTemplateRegistry._instance:
+            with BoardTemplateRegistry._lock:
+                if not BoardTemplateRegistry._instance:
+                    BoardTemplateRegistry._instance = BoardTemplateRegistry()
+        return BoardTemplateRegistry._instance
+
+    def getBoard(self, snakes, ladders):
+        key = (tuple(sorted(snakes)), tuple(sorted(ladders)))
+        board = self.boards.get(key)
+        if board is None:
+            with self.boardsLock:
+                board = self.boards.get(key)
+                if board is None:
+                    cells = Board.sharedCells(Board.BOARD_SIZE)
+                    board = Board([Snake(cells[head - 1], cells[tail - 1]) for head, tail in key[0]],
+                                  [Ladder(cells[top - 1], cells[base - 1]) for base, top in key[1]])
+                    self.boards[key] = board
+        return board
 
 class Game:
     # Design Pattern: Light weight Facade - Simplifies the process of starting and managing the game
     # SOLID: Single Responsibility Principle - Manages a game session
+    __slots__ = ("players", "board", "currentPlayerIndex", "gameId", "winner", "error")
+
     def __init__(self, players, board):
         self.players = players
         self.board = board
         self.currentPlayerIndex = 0
+        self.gameId = None
+        self.winner = None
+        self.error = None  # The exception that stopped the game, if one did
 
     def startGame(self):
         while not self.checkWinner():
@@ -84,6 +165,16 @@ class Game:
             self.moveCurrentPlayer(diceValue)
             self.currentPlayerIndex = (self.currentPlayerIndex + 1) % len(self.players)
 
+    def playTurn(self):
+        # Plays a single turn and reports whether it finished the game, so a scheduler can interleave many games.
+        player = self.players[self.currentPlayerIndex]
+        self.moveCurrentPlayer(self.rollDice())
+        if player.currentPosition == self.board.BOARD_SIZE:
+            self.winner = player
+            return True
+        self.currentPlayerIndex = (self.currentPlayerIndex + 1) % len(self.players)
+        return False
+
     def rollDice(self):
         return random.randint(1, 6)
 
@@ -100,14 +191,217 @@ class Game:
                 return True
         return False
 
+class BatchGameSimulator:
+    # Monte Carlo engine that plays many games on one Board in lockstep with NumPy.
+    # Positions live in a (players, games) int array; each turn the seat to move draws one dice array for all
+    # unfinished games, applies the overshoot rule of Player.movePiece and jumps through the Board's jump table
+    # with a single fancy-index. Finished games drop out of the active index, so late turns stay cheap.
+    def __init__(self, board: Board, numberOfPlayers: int):
+        if np is None:
+            raise ImportError("BatchGameSimulator needs numpy: pip install numpy")
+        self.boardSize = board.BOARD_SIZE
+        self.jumps = np.frombuffer(board.jumps, dtype=np.int32)
+        self.numberOfPlayers = numberOfPlayers
+
+    def run(self, numberOfGames, seed=None, maxTurns=100_000):
+        # Returns per-game winner seat and length in turns (single moves); -1 for games cut off at maxTurns.
+        rng = np.random.default_rng(seed)
+        positions = np.zeros((self.numberOfPlayers, numberOfGames), dtype=np.int32)
+        winners = np.full(numberOfGames, -1, dtype=np.int32)
+        lengths = np.full(numberOfGames, -1, dtype=np.int32)
+        active = np.arange(numberOfGames)
+        turn = 0
+        while active.size and turn < maxTurns:
+            seat = turn % self.numberOfPlayers
+            current = positions[seat, active]
+            moved = current + rng.integers(1, 7, size=active.size, dtype=np.int32)
+            moved = self.jumps[np.where(moved > self.boardSize, current, moved)]
+            positions[seat, active] = moved
+            turn += 1
+            finished = moved == self.boardSize
+            if finished.any():
+                winners[active[finished]] = seat
+                lengths[active[finished]] = turn
+                active = active[~finished]
+        return winners, lengths
+
+    def summarize(self, numberOfGames, seed=None):
+        winners, lengths = self.run(numberOfGames, seed)
+        played = lengths[lengths > 0]
+        return {
+            "games": numberOfGames,
+            "meanTurns": float(played.mean()),
+            "medianTurns": float(np.median(played)),
+            "p95Turns": float(np.percentile(played, 95)),
+            "winProbability": (np.bincount(winners[winners >= 0], minlength=self.numberOfPlayers) / numberOfGames).tolist(),
+        }
+
+class MarkovChainSolver:
+    # Exact game-length statistics for one piece on a Board, as an absorbing Markov chain.
+    # States are the cells 0..BOARD_SIZE; a roll that would pass the last cell leaves the piece in place
+    # (the overshoot rule of Player.movePiece), otherwise it moves and follows the jump table.
+    # With Q the transient-to-transient block, the fundamental matrix N = (I - Q)^-1 gives the expected
+    # turns t = N 1 and their variance (2N - I) t - t^2; the distribution comes from propagating Q.
+    def __init__(self, board: Board):
+        if np is None:
+            raise ImportError("MarkovChainSolver needs numpy: pip install numpy")
+        self.boardSize = board.BOARD_SIZE
+        self.transitions = np.zeros((self.boardSize + 1, self.boardSize + 1))
+        for cell in range(self.boardSize):
+            for diceValue in range(1, 7):
+                target = cell + diceValue
+                target = cell if target > self.boardSize else board.jumps[target]
+                self.transitions[cell, target] += 1 / 6
+        self.transitions[self.boardSize, self.boardSize] = 1.0
+        self.transient = self.transitions[:self.boardSize, :self.boardSize]
+        self.expected = np.linalg.solve(np.eye(self.boardSize) - self.transient, np.ones(self.boardSize))
+
+    def expectedTurns(self, start=0):
+        return float(self.expected[start])
+
+    def variance(self, start=0):
+        # Var = (2N - I) t - t^2, with N t computed as a second solve instead of inverting I - Q.
+        secondMoment = np.linalg.solve(np.eye(self.boardSize) - self.transient, self.expected)
+        return float((2 * secondMoment - self.expected - self.expected ** 2)[start])
+
+    def distribution(self, start=0, tolerance=1e-12, maxTurns=100_000):
+        # probabilities[k] = P(the piece reaches the last cell on exactly turn k).
+        state = np.zeros(self.boardSize)
+        state[start] = 1.0
+        finishing = self.transitions[:self.boardSize, self.boardSize]
+        probabilities = [0.0]
+        while state.sum() > tolerance and len(probabilities) <= maxTurns:
+            probabilities.append(float(state @ finishing))
+            state = state @ self.transient
+        return np.array(probabilities)
+
+DEFAULT_SNAKES = ((15, 5), (40, 20))
+DEFAULT_LADDERS = ((10, 30), (35, 60))
+
+def defaultBoard():
+    return BoardTemplateRegistry.get_instance().getBoard(DEFAULT_SNAKES, DEFAULT_LADDERS)
+
+def benchmarkBoardTemplates(numberOfSessions=10_000, numberOfPlayers=2):
+    # Memory held per live session: a freshly built Board per game against the shared template.
+    import tracemalloc
+
+    def buildSessions(boardFactory):
+        tracemalloc.start()
+        sessions = [Game([Player(f"Player {seat}", GamePiece("red")) for seat in range(numberOfPlayers)], boardFactory())
+                    for _ in range(numberOfSessions)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size / len(sessions)
+
+    def freshBoard():
+        return Board([Snake(Cell(head), Cell(tail)) for head, tail in DEFAULT_SNAKES],
+                     [Ladder(Cell(top), Cell(base)) for base, top in DEFAULT_LADDERS])
+
+    perGameFresh = buildSessions(freshBoard)
+    perGameShared = buildSessions(defaultBoard)
+    print(f"Bytes per live session: {perGameFresh:,.0f} with a Board per game, {perGameShared:,.0f} with a shared template")
+
+def benchmarkMonteCarlo(numberOfGames=1_000_000, numberOfPlayers=4, seed=0):
+    simulator = BatchGameSimulator(defaultBoard(), numberOfPlayers)
+    start = time.perf_counter()
+    summary = simulator.summarize(numberOfGames, seed)
+    elapsed = time.perf_counter() - start
+    print(f"{numberOfGames:,} games of {numberOfPlayers} players in {elapsed:.2f}s: "
+          f"mean {summary['meanTurns']:.1f} turns, median {summary['medianTurns']:.0f}, p95 {summary['p95Turns']:.0f}")
+    print("Win probability per seat: " + ", ".join(f"{p:.4f}" for p in summary["winProbability"]))
+    return summary
+
+def compareMarkovWithMonteCarlo(numberOfGames=1_000_000, seed=0):
+    # Single-piece game length: exact answer from the Markov chain against the batch simulator.
+    board = defaultBoard()
+    start = time.perf_counter()
+    solver = MarkovChainSolver(board)
+    expected, variance, probabilities = solver.expectedTurns(), solver.variance(), solver.distribution()
+    elapsed = time.perf_counter() - start
+    _, lengths = BatchGameSimulator(board, 1).run(numberOfGames, seed)
+    print(f"Markov chain ({elapsed * 1000:.1f} ms): mean {expected:.3f} turns, variance {variance:.2f}, "
+          f"P(done within 20 turns) {probabilities[:21].sum():.4f}")
+    print(f"Monte Carlo ({numberOfGames:,} games): mean {lengths.mean():.3f} turns, variance {lengths.var():.2f}, "
+          f"P(done within 20 turns) {(lengths <= 20).mean():.4f}")
+
+class GameScheduler:
+    # Fixed pool of worker threads shared by every game session, replacing one thread per game.
+    # Runnable games wait in a queue; a worker takes one, plays up to turnsPerSlice turns and puts it back,
+    # so thousands of sessions progress cooperatively on a handful of threads. A game is only ever in the
+    # queue once, so no two workers touch it at the same time. Finished games are handed to onFinished.
+    # A game whose turn raises is reported on stderr, marked with game.error and handed to onFinished as well,
+    # so one broken session neither kills its worker nor leaves join() waiting for it.
+    def __init__(self, numberOfWorkers=4, turnsPerSlice=16, onFinished=None):
+        self.runQueue = queue.SimpleQueue()
+        self.turnsPerSlice = turnsPerSlice
+        self.onFinished = onFinished
+        self.activeGames = 0
+        self.idle = threading.Condition()
+        self.workers = [threading.Thread(target=self.work, daemon=True) for _ in range(numberOfWorkers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, game):
+        with self.idle:
+            self.activeGames += 1
+        self.runQueue.put(game)
+
+    def work(self):
+        while True:
+            game = self.runQueue.get()
+            if game is None:
+                return
+            try:
+                for _ in range(self.turnsPerSlice):
+                    if game.playTurn():
+                        break
+                else:
+                    self.runQueue.put(game)
+                    continue
+            except Exception as error:
+                game.error = error
+                print(f"Game {game.gameId} failed:", file=sys.stderr)
+                traceback.print_exception(error)
+            self.finish(game)
+
+    def finish(self, game):
+        try:
+            if self.onFinished:
+                self.onFinished(game)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self.idle:
+                self.activeGames -= 1
+                if not self.activeGames:
+                    self.idle.notify_all()
+
+    def join(self):
+        # Blocks until every submitted game has finished.
+        with self.idle:
+            self.idle.wait_for(lambda: not self.activeGames)
+
+    def shutdown(self):
+        self.join()
+        for _ in self.workers:
+            self.runQueue.put(None)
+        for worker in self.workers:
+            worker.join()
+
 class GameManager:
     # Design Pattern: Singleton - Ensures only one instance of GameManager exists
     # SOLID: Single Responsibility Principle - Manages multiple game sessions
     _instance = None
     _lock = threading.Lock()
 
-    def __init__(self):
-        self.games = []
+    def __init__(self, numberOfWorkers=4, verbose=True):
+        self.games = {}  # gameId -> Game, only while the game is running; finished games are evicted.
+        self.gameIds = itertools.count(1)
+        self.gamesLock = threading.Lock()
+        self.finishedGames = 0
+        self.failedGames = 0
+        self.verbose = verbose
+        self.scheduler = GameScheduler(numberOfWorkers, onFinished=self.evictGame)
 
     @staticmethod
     def get_instance():
@@ -117,15 +411,83 @@ class GameManager:
                     GameManager._instance = GameManager()
         return GameManager._instance
 
-    def startNewGame(self, players):
-        snakes = [Snake(Cell(15), Cell(5)), Snake(Cell(40), Cell(20))]
-        ladders = [Ladder(Cell(30), Cell(10)), Ladder(Cell(60), Cell(35))]
-        board = Board(snakes, ladders)
-        game = Game(players, board)
-        self.games.append(game)
-        threading.Thread(target=game.startGame).start()
+    def startNewGame(self, players, board=None):
+        game = Game(players, board or defaultBoard())
+        with self.gamesLock:
+            game.gameId = next(self.gameIds)
+            self.games[game.gameId] = game
+        self.scheduler.submit(game)
+        return game.gameId
+
+    def evictGame(self, game):
+        with self.gamesLock:
+            del self.games[game.gameId]
+            if game.error:
+                self.failedGames += 1
+            else:
+                self.finishedGames += 1
+        if self.verbose and not game.error:
+            print(f"{game.winner.name} wins!")
+
+    def shutdown(self):
+        # Waits for the running games, then stops the worker threads.
+        self.scheduler.shutdown()
+
+def checkFailingGame(timeout=10):
+    # A game that raises on its first turn must be counted as failed while the other games still finish,
+    # and shutdown() must return instead of waiting for the broken game forever.
+    manager = GameManager(numberOfWorkers=1, verbose=False)
+    board = defaultBoard()
+    manager.startNewGame([], board)  # No players: playTurn raises IndexError.
+    for session in range(3):
+        manager.startNewGame([Player(f"Player {session}", GamePiece("red"))], board)
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        shutdown = threading.Thread(target=manager.shutdown, daemon=True)
+        shutdown.start()
+        shutdown.join(timeout)
+    assert not shutdown.is_alive(), "shutdown() hung on a failed game"
+    assert (manager.failedGames, manager.finishedGames, manager.games) == (1, 3, {})
+    assert "IndexError" in stderr.getvalue()
+    print("GameScheduler: a failing game is reported and the others still finish")
+
+def benchmarkScheduler(numberOfSessions=100_000, numberOfPlayers=2, numberOfWorkers=4):
+    # Starts every session up front so they are all live at once, then lets the worker pool drain them.
+    manager = GameManager(numberOfWorkers, verbose=False)
+    board = defaultBoard()
+    start = time.perf_counter()
+    for session in range(numberOfSessions):
+        players = [Player(f"Player {session}.{seat}", GamePiece("red")) for seat in range(numberOfPlayers)]
+        manager.startNewGame(players, board)
+    submitted = time.perf_counter() - start
+    peakThreads = threading.active_count()
+    manager.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"{numberOfSessions:,} concurrent sessions on {numberOfWorkers} workers: submitted in {submitted:.2f}s, "
+          f"all finished in {elapsed:.2f}s ({peakThreads} threads, {len(manager.games)} games left in memory)")
 
 if __name__ == "__main__":
+    if "--self-test" in sys.argv:
+        # python snake_and_ladder.py --self-test
+        checkFailingGame()
+        sys.exit()
+    if "--monte-carlo" in sys.argv:
+        # python snake_and_ladder.py --monte-carlo
+        benchmarkMonteCarlo()
+        sys.exit()
+    if "--markov" in sys.argv:
+        # python snake_and_ladder.py --markov
+        compareMarkovWithMonteCarlo()
+        sys.exit()
+    if "--scheduler-benchmark" in sys.argv:
+        # python snake_and_ladder.py --scheduler-benchmark
+        benchmarkScheduler()
+        sys.exit()
+    if "--template-benchmark" in sys.argv:
+        # python snake_and_ladder.py --template-benchmark
+        benchmarkBoardTemplates()
+        sys.exit()
+
     game_manager = GameManager.get_instance()
     player_1 = Player("Player 1", GamePiece("red"))
     player_2 = Player("Player 2", GamePiece("blue"))
@@ -145,17 +507,23 @@ if __name__ == "__main__":
     # Start game 2
     game_manager.startNewGame(players_B)
 
+    game_manager.shutdown()
+
 
 """
 Explaination:
 
 Classes, Interfaces and Enumerations:
 The Board class represents the game board with a fixed size (e.g., 100 cells). It contains the positions of snakes and ladders and provides methods to initialize them and retrieve the new position after encountering a snake or ladder.
+On construction the Board precomputes a jump table mapping every cell to its final destination, chained snakes and ladders included, so each move is one array lookup; printing of bites and climbs is opt-in through verbose.
 The Player class represents a player in the game, with properties such as name and current position on the board.
 The Snake class represents a snake on the board, with properties for the start and end positions.
 The Ladder class represents a ladder on the board, with properties for the start and end positions.
 The Dice class represents a dice used in the game, with a method to roll the dice and return a random value between 1 and 6.
 The SnakeAndLadderGame class represents a single game session. It initializes the game with a board, a list of players, and a dice. The play method handles the game loop, where players take turns rolling the dice and moving their positions on the board. It checks for snakes and ladders and updates the player's position accordingly. The game continues until a player reaches the final position on the board.
-The GameManager class is a singleton that manages multiple game sessions. It maintains a list of active games and provides a method to start a new game with a list of player names. Each game is started in a separate thread to allow concurrent game sessions.
+The BoardTemplateRegistry class interns one immutable, precompiled Board (shared flyweight cells, snakes, ladders and jump table) per layout, so all Game instances on that layout share it and a session only holds its players' positions.
+The BatchGameSimulator class plays millions of games on one Board at once with NumPy: dice rolls, positions and jump-table lookups are arrays, and finished games are masked out, giving game-length distributions and per-seat win probabilities in seconds.
+The MarkovChainSolver class builds the absorbing transition matrix of a Board (snakes, ladders and the overshoot rule) and solves it for the exact expected number of turns, its variance and the full turns-to-finish distribution.
+The GameManager class is a singleton that manages multiple game sessions. It maintains a list of active games and provides a method to start a new game with a list of player names. Games are no longer given a thread each: the GameScheduler runs them on a fixed pool of worker threads, interleaving slices of turns from every session, and finished games are evicted from the GameManager.
 The SnakeAndLadderDemo class demonstrates the usage of the game by creating an instance of the GameManager and starting two separate game sessions with different sets of players.
 """
\ No newline at end of file